@@ -1,6 +1,10 @@
 import streamlit as st
-from pytube import YouTube, Search
 import time
+from video_fetch import analyze_video, default_backend, stream_top_videos
+from keyword_matcher import default_matcher
+from video_index import default_index
+from thumbnails import default_thumbnails
+import metrics
 
 st.set_page_config(page_title="Chemical Engineering YouTube Search", layout="wide")
 st.title("Chemical Engineering YouTube Search Engine")
@@ -21,87 +25,88 @@ with st.form("search_form"):
     max_duration = st.slider("Maximum video duration (minutes)", 10, 120, 60)
     submitted = st.form_submit_button("Search")
 
+def render_videos(videos, wait=True):
+    with metrics.span("che27.render"):
+        # Queue every thumbnail first so they download side by side rather than
+        # one per card; ones already cached or downloading are skipped
+        for video in videos:
+            default_thumbnails().prefetch(video["thumbnail"])
+        for i, video in enumerate(videos):
+            col1, col2 = st.columns([1, 3])
+
+            with col1:
+                # Served from the local thumbnail cache; the remote URL is the
+                # fallback. wait=False leaves thumbnails still downloading blank.
+                thumbnail = default_thumbnails().get(video["thumbnail"], wait)
+                if thumbnail or wait:
+                    st.image(thumbnail or video["thumbnail"], width=200)
+
+            with col2:
+                st.subheader(f"{i+1}. {video['title']}")
+                st.markdown(f"""
+                - **Duration:** {video['duration']} minutes
+                - **Language:** {'Arabic' if video['language'] == 'arabic' else 'English' if video['language'] == 'english' else 'Hindi'}
+                - **From Egyptian University:** {'Yes' if video['egyptian'] else 'No'}
+                - [Watch Video]({video['url']})
+                """)
+
+            st.markdown("---")
+
+# ?profile=1 in the page URL writes a cProfile dump per search
+profiling = st.query_params.get("profile") == "1"
+
 if submitted and query:
     st.subheader(f"Search results for: '{query}'")
     progress_bar = st.progress(0)
     status_text = st.empty()
+    summary = st.empty()
+    results_area = st.empty()
     
     try:
-        search_results = Search(f"{query} chemical engineering").results
-        filtered_videos = []
-        
-        for i, video in enumerate(search_results[:max_results*3]):
-            progress = (i + 1) / min(max_results*3, len(search_results))
-            progress_bar.progress(progress)
-            status_text.text(f"Analyzing videos... {int(progress*100)}%")
-            
-            try:
-                yt = YouTube(video.watch_url)
-                duration = yt.length
-                
-                if not (min_duration*60 <= duration <= max_duration*60):
-                    continue
-                
-                title = yt.title.lower()
-                description = yt.description.lower() if yt.description else ""
-                
-                language = "other"
-                if any(word in title+description for word in ["عرب", "arabic", "بالعربي", "شرح"]):
-                    language = "arabic"
-                elif any(word in title+description for word in ["eng", "english", "lecture", "course"]):
-                    language = "english"
-                elif any(word in title+description for word in ["hindi", "हिंदी"]):
-                    language = "hindi"
-                
-                egyptian_university = any(univ in title+description for univ in ["cairo", "جامعة القاهرة", "عين شمس", "alexandria", "الإسكندرية"])
-                
-                score = 0
-                if language == "arabic":
-                    score += 3
-                elif language == "english":
-                    score += 2
-                elif language == "hindi":
-                    score += 1
-                
-                if egyptian_university:
-                    score += 2
-                
-                filtered_videos.append({
-                    "title": yt.title,
-                    "url": yt.watch_url,
-                    "duration": f"{duration//60}:{duration%60:02d}",
-                    "language": language,
-                    "egyptian": egyptian_university,
-                    "score": score,
-                    "thumbnail": yt.thumbnail_url
-                })
-                
-            except Exception as e:
-                continue
-        
-        filtered_videos.sort(key=lambda x: x["score"], reverse=True)
-        
-        if not filtered_videos:
-            st.warning("No videos found matching your criteria.")
-        else:
-            st.success(f"Found {len(filtered_videos[:max_results])} videos matching your criteria.")
-            
-            for i, video in enumerate(filtered_videos[:max_results]):
-                col1, col2 = st.columns([1, 3])
-                
-                with col1:
-                    st.image(video["thumbnail"], width=200)
-                
-                with col2:
-                    st.subheader(f"{i+1}. {video['title']}")
-                    st.markdown(f"""
-                    - **Duration:** {video['duration']} minutes
-                    - **Language:** {'Arabic' if video['language'] == 'arabic' else 'English' if video['language'] == 'english' else 'Hindi'}
-                    - **From Egyptian University:** {'Yes' if video['egyptian'] else 'No'}
-                    - [Watch Video]({video['url']})
-                    """)
-                
-                st.markdown("---")
+        with metrics.profile("che27.search", profiling), metrics.span("che27.search"):
+            # Answered from the local index of previously fetched videos (BM25 plus
+            # the language/university bonus) when enough of them contain every
+            # query term and are still fresh in the metadata cache
+            index = default_index()
+            index.sync()
+            shown = [analyze_video(meta, min_duration, max_duration)
+                     for _, meta in index.search_cached(query, max_results, min_duration*60, max_duration*60,
+                                                        min_coverage=1.0)]
+            metrics.count("che27_searches_total", source="index" if len(shown) == max_results else "live")
+            if len(shown) == max_results:
+                with results_area.container():
+                    render_videos(shown)
+            else:
+                # Pages and metadata are pulled lazily; the search stops as soon as
+                # the top results can no longer change or the budget is spent: 3 fetches
+                # per result once enough videos qualify, up to 10 per result until then
+                budget = max_results*10
+                shown = []
+                for done, top in stream_top_videos(default_backend(), f"{query} chemical engineering", max_results,
+                                                   lambda meta: analyze_video(meta, min_duration, max_duration),
+                                                   default_matcher().max_score, budget, max_results*3):
+                    # Against the cap in force: 3 fetches per result once the top list
+                    # is full, the whole budget while it is still filling
+                    progress = min(done / (max_results*3 if len(top) == max_results else budget), 1.0)
+                    progress_bar.progress(progress)
+                    status_text.text(f"Analyzing videos... {int(progress*100)}%")
+
+                    if top != shown:
+                        shown = top
+                        with results_area.container():
+                            render_videos(shown, wait=False)
+
+                with results_area.container():
+                    render_videos(shown)
+
+                # Fetched metadata went into the cache; fold it into the index
+                if index.sync():
+                    index.save_later()
+
+            if not shown:
+                summary.warning("No videos found matching your criteria.")
+            else:
+                summary.success(f"Found {len(shown)} videos matching your criteria.")
     
     except Exception as e:
         st.error(f"Error during search: {str(e)}")
@@ -1,81 +1,267 @@
 import streamlit as st
-import pandas as pd
-from fpdf import FPDF
-import base64
+import calendar
+import io
+import os
+import tempfile
+from lca import ui
+from lca.core import VALUE_FORMATS, compute_impacts, results_table
+from lca.factor_registry import FactorRegistry, default_registry
+from lca.report import MAX_REPORT_LOTS, batch_report
+import metrics
 
 # --- Data Setup ---
-material_impacts = {
-    "Ammonia": {"co2": 2.38, "water": 1.8, "energy": 38.0, "acidification": 0.022},
-    "Ethylene": {"co2": 1.75, "water": 1.2, "energy": 78.0, "acidification": 0.015},
-    "PVC": {"co2": 2.8, "water": 1.7, "energy": 62.0, "acidification": 0.028}
-}
-
-energy_impacts = {
-    "Coal": {"co2": 1.02, "water": 0.004, "energy": 3.6, "acidification": 0.0012},
-    "Natural Gas": {"co2": 0.49, "water": 0.002, "energy": 3.6, "acidification": 0.0003},
-    "Solar": {"co2": 0.05, "water": 0.001, "energy": 3.6, "acidification": 0.0001}
-}
+registry = default_registry()
 
 # --- App Config ---
-st.set_page_config(
-    page_title="LCA Calculator",
-    page_icon="🌱",
-    layout="centered"
-)
+ui.page_config()
 
 # --- Main App ---
 def main():
     st.title("♻️ Chemical Process LCA Calculator")
     st.markdown("---")
     
+    mode = st.radio("Mode", ["Single", "Batch", "Supply Chain", "Sweep", "Hourly Grid"], horizontal=True)
+    if mode == "Batch":
+        batch_mode()
+        return
+    if mode == "Hourly Grid":
+        hourly_grid_mode()
+        return
+    if mode == "Sweep":
+        sweep_mode()
+        return
+    if mode == "Supply Chain":
+        supply_chain_mode()
+        return
+    
     # Input Section
+    material, material_amount, energy_type, energy_amount = ui.scenario_inputs(registry)
+    
+    with st.expander("Uncertainty (Monte Carlo)"):
+        mc_samples = st.number_input("Samples (0 = off)", min_value=0, value=0, step=10000)
+        mc_seed = st.number_input("Random Seed", min_value=0, value=42, step=1)
+    
+    # Calculation Logic
+    if st.button("Calculate Impact", type="primary"):
+        calculate_impact(material, material_amount, energy_type, energy_amount, int(mc_samples), int(mc_seed))
+
+# --- Batch Mode ---
+def batch_mode():
+    # Each mode imports its own analysis modules (and with them pandas, scipy
+    # or pyarrow) the first time it is opened
+    from lca.batch import calculate_batch, read_batch_file
+    
+    st.caption("Upload a CSV or Parquet file with columns: material, amount_kg, energy_source, energy_kwh")
+    uploaded = st.file_uploader("Batch File", type=["csv", "parquet"])
+    if uploaded is None:
+        return
+    
+    try:
+        results_df = calculate_batch(read_batch_file(uploaded), registry)
+    except Exception as e:
+        st.error(f"Batch Error: {str(e)}")
+        return
+    
+    st.success(f"### Results ({len(results_df)} rows)")
+    st.dataframe(results_df.head(1000), hide_index=True, use_container_width=True)
+    ui.download_results(results_df, "📊 Download Batch Results", "lca_batch_results")
+    if len(results_df) > MAX_REPORT_LOTS:
+        st.caption(f"The PDF report covers the first {MAX_REPORT_LOTS:,} lots.")
+    # Rendered only when the button is clicked
+    st.download_button(
+        label="📄 Download Batch PDF Report",
+        data=lambda: batch_report(results_df),
+        file_name="lca_batch_report.pdf",
+        mime="application/pdf"
+    )
+
+# --- Hourly Grid Mode ---
+# Uploads are converted and reduced once per pair of files; a rerun (e.g. a
+# new facility) only computes that facility's hourly series. The memory-mapped
+# profiles are a resource rather than data, so they are not copied per rerun;
+# their temporary .npy goes away with the cache entry.
+@st.cache_resource(max_entries=2)
+def cached_profiles(consumption):
+    from lca.grid_intensity import csv_to_profiles
+    
+    tmp = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+    names, profiles = csv_to_profiles(io.BytesIO(consumption), os.path.join(tmp.name, "profiles.npy"))
+    return names, profiles, tmp
+
+@st.cache_data(max_entries=4, hash_funcs={FactorRegistry: id})
+def cached_grid_totals(consumption, intensity_csv, registry, energy_type):
+    import pandas as pd
+    from lca.grid_intensity import facility_summary, load_intensity, monthly_co2
+    
+    names, profiles, _ = cached_profiles(consumption)
+    intensity = load_intensity(io.BytesIO(intensity_csv))
+    summary = facility_summary(profiles, intensity, names, registry, energy_type)
+    monthly = pd.DataFrame(monthly_co2(profiles, intensity), index=names, columns=list(calendar.month_abbr)[1:])
+    return intensity, summary, monthly
+
+def hourly_grid_mode():
+    import pandas as pd
+    from lca.grid_intensity import hourly_co2
+    
+    st.caption("Consumption CSV: facility, h0 ... h8759 (kWh) | Intensity CSV: intensity (kg CO₂/kWh per hour)")
+    consumption_file = st.file_uploader("Consumption Profiles", type=["csv"])
+    intensity_file = st.file_uploader("Grid Intensity Profile", type=["csv"])
+    energy_type = st.selectbox("Energy Source (non-CO₂ factors)", registry.names("energy"))
+    if consumption_file is None or intensity_file is None:
+        return
+    
+    try:
+        consumption = consumption_file.getvalue()
+        intensity, summary, monthly = cached_grid_totals(consumption, intensity_file.getvalue(), registry, energy_type)
+        names, profiles, _ = cached_profiles(consumption)
+        facility = st.selectbox("Facility", names)
+        hourly = hourly_co2(profiles[names.index(facility)], intensity)
+    except Exception as e:
+        st.error(f"Hourly Grid Error: {str(e)}")
+        return
+    
+    st.success(f"### Results ({len(summary)} facilities)")
+    st.dataframe(summary, hide_index=True, use_container_width=True)
+    st.subheader(f"Hourly CO₂ for {facility} (kg)")
+    st.line_chart(pd.Series(hourly, name="co2"))
+    st.subheader("Monthly CO₂ (kg)")
+    st.dataframe(monthly, use_container_width=True)
+    ui.download_results(summary, "📊 Download Facility Summary", "lca_hourly_summary")
+
+# --- Sweep Mode ---
+# Kept across reruns: only changing the grid inputs recomputes it. The
+# registry is keyed by identity, since a new one is built when its file changes.
+@st.cache_data(max_entries=4, hash_funcs={FactorRegistry: id})
+def cached_sweep_summary(registry, materials, energies, kg_values, kwh_values, metric):
+    from lca.sweep import sweep_summary
+    
+    return sweep_summary(registry, materials, energies, kg_values, kwh_values, metric)
+
+def sweep_mode():
+    import numpy as np
+    import pandas as pd
+    from lca.sweep import MAX_TABLE_ROWS, comparison_frame, sweep_frame, sweep_grid, tornado
+    from lca.uncertainty import default_uncertainty
+    
+    st.caption("Compare every material × energy source × amount combination at once")
+    materials = st.multiselect("Materials", registry.names("material"), default=registry.names("material"))
+    energies = st.multiselect("Energy Sources", registry.names("energy"), default=registry.names("energy"))
+    metric = st.selectbox("Metric", list(registry.categories))
+    
     col1, col2 = st.columns(2)
     with col1:
-        material = st.selectbox("Select Material", list(material_impacts.keys()))
+        kg_min, kg_max = st.slider("Amount Range (kg)", 0.0, 10000.0, (0.0, 1000.0))
+        kg_steps = st.number_input("Amount Steps", min_value=2, max_value=5000, value=100)
+    with col2:
+        kwh_min, kwh_max = st.slider("Energy Range (kWh)", 0.0, 50000.0, (0.0, 1000.0))
+        kwh_steps = st.number_input("Energy Steps", min_value=2, max_value=5000, value=100)
+    
+    if not materials or not energies:
+        st.warning("Select at least one material and one energy source.")
+        return
+    
+    kg_values = np.linspace(kg_min, kg_max, int(kg_steps))
+    kwh_values = np.linspace(kwh_min, kwh_max, int(kwh_steps))
+    points = len(materials) * len(energies) * len(kg_values) * len(kwh_values)
+    st.subheader(f"{metric} over {points:,} Scenarios")
+    st.dataframe(cached_sweep_summary(registry, materials, energies, kg_values, kwh_values, metric),
+                 hide_index=True, use_container_width=True)
+    
+    kwh_index = st.slider("Energy Level for Comparison (step)", 0, len(kwh_values) - 1, len(kwh_values) // 2)
+    st.subheader(f"{metric} vs Amount at {kwh_values[kwh_index]:.1f} kWh")
+    st.line_chart(comparison_frame(registry, materials, energies, kg_values, kwh_values[kwh_index], metric))
+    
+    # The full grid and its long table are only built when the download is clicked
+    if points > MAX_TABLE_ROWS:
+        st.info(f"Sweep has {points:,} points; narrow the grid to at most {MAX_TABLE_ROWS:,} for download")
+    else:
+        ui.download_results(lambda: sweep_frame(sweep_grid(registry, materials, energies, kg_values, kwh_values, metric),
+                                                materials, energies, kg_values, kwh_values, metric),
+                            "📊 Download Sweep Table", "lca_sweep")
+    
+    # Sensitivity for one operating point
+    st.markdown("---")
+    st.subheader("Sensitivity (Tornado)")
+    col1, col2 = st.columns(2)
+    with col1:
+        material = st.selectbox("Material", materials)
         material_amount = st.number_input("Amount (kg)", min_value=0.0, value=1.0, step=0.1)
     with col2:
-        energy_type = st.selectbox("Energy Source", list(energy_impacts.keys()))
+        energy_type = st.selectbox("Energy", energies)
         energy_amount = st.number_input("Energy (kWh)", min_value=0.0, value=1.0, step=0.1)
+    swing = st.slider("Amount Swing (±%)", 1, 50, 10) / 100
     
-    # Calculation Logic
-    if st.button("Calculate Impact", type="primary"):
-        calculate_impact(material, material_amount, energy_type, energy_amount)
+    sens = tornado(registry, material, material_amount, energy_type, energy_amount, swing, default_uncertainty())
+    sens = sens[sens["category"] == metric]
+    chart = pd.DataFrame({
+        "Low": sens["low"].to_numpy() - sens["base"].to_numpy(),
+        "High": sens["high"].to_numpy() - sens["base"].to_numpy(),
+    }, index=sens["input"])
+    st.bar_chart(chart, horizontal=True, stack=True)
+    st.dataframe(sens, hide_index=True, use_container_width=True)
+
+# --- Supply Chain Mode ---
+def supply_chain_mode():
+    import pandas as pd
+    from lca.supply_chain import default_model, scenarios_from_frame
+    
+    model = default_model()
+    st.caption("Cradle-to-gate impacts including upstream processes")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        product = st.selectbox("Product", model.processes)
+    with col2:
+        amount = st.number_input("Amount (kg)", min_value=0.0, value=1.0, step=0.1)
+    
+    if st.button("Calculate Supply Chain Impact", type="primary"):
+        try:
+            totals = model.solve({product: amount})[0]
+            contributions = model.contributions({product: amount})
+        except Exception as e:
+            st.error(f"Supply Chain Error: {str(e)}")
+            return
+        st.success("### Results")
+        st.dataframe(pd.DataFrame({"Metric": model.categories, "Total": totals}), hide_index=True, use_container_width=True)
+        st.subheader("Process Contributions")
+        st.dataframe(contributions[contributions.abs().sum(axis=1) > 0], use_container_width=True)
+    
+    st.markdown("---")
+    st.caption("Scenario file columns: scenario, process, amount_kg")
+    uploaded = st.file_uploader("Scenario File", type=["csv"])
+    if uploaded is not None:
+        try:
+            names, demands = scenarios_from_frame(pd.read_csv(uploaded))
+            scenario_df = pd.DataFrame(model.solve(demands), columns=model.categories)
+            scenario_df.insert(0, "scenario", names)
+        except Exception as e:
+            st.error(f"Scenario Error: {str(e)}")
+            return
+        st.dataframe(scenario_df, hide_index=True, use_container_width=True)
+        ui.download_results(scenario_df, "📊 Download Scenario Results", "lca_scenarios")
 
 # --- Core Function ---
-def calculate_impact(material, mat_amount, energy_type, energy_amount):
-    co2 = (material_impacts[material]["co2"] * mat_amount) + (energy_impacts[energy_type]["co2"] * energy_amount)
-    water = (material_impacts[material]["water"] * mat_amount) + (energy_impacts[energy_type]["water"] * energy_amount)
-    energy = (material_impacts[material]["energy"] * mat_amount) + (energy_impacts[energy_type]["energy"] * energy_amount)
-    acid = (material_impacts[material]["acidification"] * mat_amount) + (energy_impacts[energy_type]["acidification"] * energy_amount)
+def calculate_impact(material, mat_amount, energy_type, energy_amount, mc_samples=0, mc_seed=None):
+    impacts = compute_impacts(registry, material, mat_amount, energy_type, energy_amount)
     
     # Display Results
     st.success("### Results")
-    results_df = pd.DataFrame({
-        "Metric": ["CO₂ Emissions", "Water Use", "Energy Demand", "Acidification"],
-        "Value": [f"{co2:.2f} kg", f"{water:.2f} m³", f"{energy:.2f} MJ", f"{acid:.4f} kg SO₂-eq"],
-        "Score": [min(int(co2/2)+1, 10), min(int(water/2)+1, 10), min(int(energy/50)+1, 10), min(int(acid*100)+1, 10)]
-    })
+    results_df = results_table(impacts)
+    
+    # Uncertainty Percentiles
+    if mc_samples:
+        from lca.uncertainty import default_uncertainty, impact_uncertainty
+        mc = impact_uncertainty(registry, default_uncertainty(), material, mat_amount, energy_type, energy_amount,
+                                n_samples=mc_samples, seed=mc_seed)
+        for q in ["p5", "p50", "p95"]:
+            results_df[q.upper()] = [fmt.format(v) for fmt, v in zip(VALUE_FORMATS, mc[q])]
     st.dataframe(results_df, hide_index=True, use_container_width=True)
     
-    # PDF Export
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font("Arial", size=12)
-    pdf.cell(200, 10, txt="LCA Calculation Report", ln=1, align='C')
-    pdf.cell(200, 10, txt=f"Material: {material} ({mat_amount} kg)", ln=1)
-    pdf.cell(200, 10, txt=f"Energy: {energy_type} ({energy_amount} kWh)", ln=1)
-    pdf.ln(10)
-    for _, row in results_df.iterrows():
-        pdf.cell(200, 10, txt=f"{row['Metric']}: {row['Value']} | Score: {row['Score']}/10", ln=1)
-    
-    pdf_output = pdf.output(dest='S').encode('latin1')
-    st.download_button(
-        label="📄 Export Report as PDF",
-        data=pdf_output,
-        file_name="lca_report.pdf",
-        mime="application/pdf"
-    )
+    # PDF Export (rendered off-thread, cached by inputs)
+    ui.pdf_button(material, mat_amount, energy_type, energy_amount, results_df)
 
 # --- Run App ---
 if __name__ == "__main__":
-    main()
+    # ?profile=1 in the page URL writes a cProfile dump per rerun
+    with metrics.profile("lca.app", st.query_params.get("profile") == "1"):
+        main()
@@ -0,0 +1,80 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from video_index import VideoIndex, load_index  # noqa: E402
+
+# --- Synthetic Corpus ---
+ENGLISH = ("distillation column reactor heat transfer mass balance thermodynamics fluid mechanics "
+           "separation process design kinetics catalyst pump valve control lecture course tutorial "
+           "engineering chemical plant safety petroleum refinery polymer membrane absorption").split()
+ARABIC = "شرح التقطير المفاعل انتقال الحرارة ميكانيكا الموائع الديناميكا الحرارية محاضرة الهندسة الكيميائية".split()
+
+
+def synthetic_videos(n, seed=0):
+    rng = random.Random(seed)
+    vocabulary = ENGLISH + ARABIC + [f"term{i}" for i in range(20000)]
+    for i in range(n):
+        words = rng.choices(vocabulary, k=rng.randint(40, 160))
+        yield {
+            "video_id": f"vid{i:07d}",
+            "title": " ".join(words[:8]),
+            "description": " ".join(words[8:]),
+            "length": rng.randint(60, 7200),
+            "thumbnail_url": "",
+            "watch_url": f"https://youtube.com/watch?v=vid{i:07d}",
+        }
+
+
+# --- Benchmark ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build/update/query benchmark for the BM25 video index")
+    parser.add_argument("--docs", type=int, default=100_000)
+    parser.add_argument("--updates", type=int, default=5_000)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    videos = list(synthetic_videos(args.docs))
+    index = VideoIndex()
+    start = time.perf_counter()
+    index.add_many(videos)
+    build = time.perf_counter() - start
+    print(f"build      {args.docs} docs in {build:.2f} s ({args.docs / build:,.0f} docs/s), "
+          f"{len(index.term_ids):,} terms")
+
+    updates = list(synthetic_videos(args.updates, seed=1))
+    start = time.perf_counter()
+    for meta in updates:
+        index.add(meta)
+    update = time.perf_counter() - start
+    print(f"update     {args.updates} re-indexed one by one in {update:.2f} s "
+          f"({update / args.updates * 1e3:.3f} ms/doc)")
+
+    rng = random.Random(2)
+    latencies = []
+    for _ in range(args.queries):
+        query = " ".join(rng.choices(ENGLISH + ARABIC, k=rng.randint(1, 4)))
+        start = time.perf_counter()
+        index.search(query, k=10, min_length=600, max_length=3600)
+        latencies.append(time.perf_counter() - start)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1e3
+    print(f"query      p50 {p50:.2f} ms, p95 {p95:.2f} ms, p99 {p99:.2f} ms")
+
+    path = os.path.join(tempfile.mkdtemp(), "index.pkl")
+    start = time.perf_counter()
+    index.save(path)
+    saved = time.perf_counter() - start
+    start = time.perf_counter()
+    load_index(path)
+    loaded = time.perf_counter() - start
+    print(f"persist    save {saved:.2f} s, load {loaded:.2f} s, {os.path.getsize(path) / 2**20:.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()
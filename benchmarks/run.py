@@ -0,0 +1,367 @@
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Keep the run self-contained: no thumbnails written into data/
+os.environ.setdefault("CHE27_THUMBNAIL_DIR", os.path.join(tempfile.mkdtemp(), "thumbnails"))
+
+import metrics  # noqa: E402
+
+# --- Defaults ---
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(HERE, "baseline.json")
+FIXTURES_PATH = os.path.join(HERE, "fixtures", "videos.json")
+MIN_TIME = 0.5
+MIN_REPEATS = 5
+MAX_REPEATS = 2000
+TOLERANCE = 0.30
+MEMORY_SLACK = 1 << 20
+RETRIES = 2
+SEED = 27
+
+CASES = {}
+
+
+def case(name, sizes=(None,)):
+    # Registers setup(size) -> (callable, items handled per call) once per
+    # size; sized cases are named "name[size]"
+    def register(setup):
+        for size in sizes:
+            CASES[name if size is None else f"{name}[{size}]"] = (setup, size)
+        return setup
+    return register
+
+
+# --- LCA ---
+def _lots(n):
+    from lca.factor_registry import default_registry
+    registry = default_registry()
+    rng = np.random.default_rng(SEED)
+    return registry, pd.DataFrame({
+        "material": rng.choice(registry.names("material"), n),
+        "amount_kg": rng.uniform(0.1, 1000, n).round(3),
+        "energy_source": rng.choice(registry.names("energy"), n),
+        "energy_kwh": rng.uniform(1, 5000, n).round(3),
+    })
+
+
+@case("lca.single")
+def lca_single(_):
+    from lca.core import compute_impacts, results_table
+    registry, lots = _lots(1)
+    row = lots.iloc[0]
+    return lambda: results_table(compute_impacts(registry, row["material"], row["amount_kg"],
+                                                 row["energy_source"], row["energy_kwh"])), 1
+
+
+@case("lca.batch", sizes=(1_000, 100_000, 1_000_000))
+def lca_batch(n):
+    from lca.batch import calculate_batch
+    registry, lots = _lots(n)
+    return lambda: calculate_batch(lots, registry), n
+
+
+@case("lca.create_pdf", sizes=(10, 100, 1_000, 10_000, 50_000))
+def lca_create_pdf(n):
+    # The renderer's build step, without its result cache
+    from lca.batch import calculate_batch
+    from lca.report import batch_sections, render_sections
+    registry, lots = _lots(n)
+    results = calculate_batch(lots, registry)
+    return lambda: render_sections("LCA Batch Report", batch_sections(results)), n
+
+
+@case("lca.create_csv", sizes=(1_000, 10_000, 100_000))
+def lca_create_csv(n):
+    from lca.batch import calculate_batch
+    from lca.export import export_bytes
+    registry, lots = _lots(n)
+    results = calculate_batch(lots, registry)
+    return lambda: export_bytes(results, "csv"), n
+
+
+@case("lca.sweep_summary", sizes=(1_000,))
+def lca_sweep_summary(n):
+    # Every material x energy pair over an n x n amount grid
+    from lca.factor_registry import default_registry
+    from lca.sweep import sweep_summary
+    registry = default_registry()
+    materials, energies = registry.names("material"), registry.names("energy")
+    kg, kwh = np.linspace(0, 1000, n), np.linspace(0, 1000, n)
+    return (lambda: sweep_summary(registry, materials, energies, kg, kwh, "co2"),
+            len(materials) * len(energies) * n * n)
+
+
+# --- Pipe Friction ---
+# (Re range, relative roughness range) per flow regime
+REGIMES = {
+    "laminar": ((100, 1999), (1e-6, 1e-2)),
+    "transitional": ((2000, 4000), (1e-6, 1e-3)),
+    "rough": ((1e6, 1e8), (1e-2, 5e-2)),
+}
+
+
+def _regime(name, n):
+    (re_lo, re_hi), (rr_lo, rr_hi) = REGIMES[name]
+    rng = np.random.default_rng(SEED)
+    Re = np.exp(rng.uniform(np.log(re_lo), np.log(re_hi), n))
+    D = rng.uniform(0.01, 1.0, n)
+    epsilon = np.exp(rng.uniform(np.log(rr_lo), np.log(rr_hi), n)) * D
+    return Re, epsilon, D
+
+
+@case("pipe.colebrook_white", sizes=tuple(REGIMES))
+def pipe_colebrook_white(regime):
+    from pipe_solver import colebrook_white
+    inputs = list(zip(*(a.tolist() for a in _regime(regime, 1_000))))
+    return lambda: [colebrook_white(Re, epsilon, D) for Re, epsilon, D in inputs], len(inputs)
+
+
+@case("pipe.colebrook_array", sizes=tuple(REGIMES))
+def pipe_colebrook_array(regime):
+    from pipe_solver import colebrook_array
+    Re, epsilon, D = _regime(regime, 100_000)
+    return lambda: colebrook_array(Re, epsilon, D), len(Re)
+
+
+@case("pipe.solve_velocity", sizes=tuple(REGIMES))
+def pipe_solve_velocity(regime):
+    # Head losses chosen so the solved flow lands in the regime
+    from pipe_solver import colebrook_array, g, mu, rho, solve_velocity_from_head_loss
+    Re, epsilon, D = _regime(regime, 200)
+    L = 100.0
+    V = Re * mu / (rho * D)
+    h_f = colebrook_array(Re, epsilon, D) * (L / D) * V ** 2 / (2 * g)
+    inputs = list(zip(D.tolist(), h_f.tolist(), epsilon.tolist()))
+    return lambda: [solve_velocity_from_head_loss(L, D, h_f, epsilon) for D, h_f, epsilon in inputs], len(inputs)
+
+
+# --- Fluid Properties ---
+def _segments(n):
+    # Pipes carrying a random mix of catalog fluids, each inside its table
+    from fluids import default_fluids
+    fluids = default_fluids()
+    rng = np.random.default_rng(SEED)
+    codes = rng.integers(len(fluids.names), size=n)
+    T = rng.uniform(fluids.T_min[codes], fluids.T_max[codes])
+    return fluids, np.asarray(fluids.names, dtype=object)[codes], T
+
+
+@case("fluids.properties", sizes=(1_000, 100_000))
+def fluids_properties(n):
+    fluids, names, T = _segments(n)
+    return lambda: fluids.properties(names, T), n
+
+
+@case("pipe.solve_pipes_fluids", sizes=(100_000,))
+def pipe_solve_pipes_fluids(n):
+    # Forward and inverse rows, per-pipe fluid and temperature
+    from pipe_solver import solve_pipes
+    _, names, T = _segments(n)
+    rng = np.random.default_rng(SEED)
+    D = rng.uniform(0.02, 0.5, n)
+    Q = np.where(rng.random(n) < 0.5, rng.uniform(1e-4, 0.2, n), np.nan)
+    pipes = pd.DataFrame({"pipe_type": "steel", "L": rng.uniform(10, 1000, n), "D": D, "Q": Q,
+                          "h_f": np.where(np.isnan(Q), rng.uniform(0.1, 20, n), np.nan), "fluid": names, "T": T})
+    return lambda: solve_pipes(pipes), n
+
+
+# --- Video Search ---
+def _fixtures():
+    with open(FIXTURES_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _stub_pytube(videos, page_size=20):
+    # Stands in for pytube.Search/YouTube, replaying recorded metadata
+    by_url = {video["watch_url"]: video for video in videos}
+
+    class Search:
+        def __init__(self, query):
+            self.results = [types.SimpleNamespace(watch_url=v["watch_url"]) for v in videos[:page_size]]
+
+        def get_next_results(self):
+            if len(self.results) >= len(videos):
+                raise IndexError("no more results")
+            more = videos[len(self.results):len(self.results) + page_size]
+            self.results += [types.SimpleNamespace(watch_url=v["watch_url"]) for v in more]
+
+    class YouTube:
+        def __init__(self, url):
+            meta = by_url[url]
+            self.__dict__.update(meta)
+
+    module = types.ModuleType("pytube")
+    module.Search = Search
+    module.YouTube = YouTube
+    return module
+
+
+@case("che27.scoring")
+def che27_scoring(_):
+    from video_fetch import analyze_video
+    videos = _fixtures()["videos"]
+    return lambda: [analyze_video(meta, 1, 120) for meta in videos], len(videos)
+
+
+@case("che27.pipeline")
+def che27_pipeline(_):
+    # Search pages -> concurrent metadata -> scoring -> bounded top-k, through
+    # the real pytube backend with Search/YouTube stubbed
+    from keyword_matcher import default_matcher
+    from video_fetch import PytubeBackend, analyze_video, stream_top_videos
+    fixtures = _fixtures()
+    sys.modules["pytube"] = _stub_pytube(fixtures["videos"])
+    backend = PytubeBackend()
+    max_score = default_matcher().max_score
+
+    def run():
+        for _ in stream_top_videos(backend, fixtures["query"], 10, lambda meta: analyze_video(meta, 10, 60),
+                                   max_score, 100, 30):
+            pass
+
+    return run, 1
+
+
+@case("video.index_search", sizes=(20_000,))
+def video_index_search(n):
+    from bench_index import ENGLISH, synthetic_videos
+    from video_index import VideoIndex
+    index = VideoIndex()
+    index.add_many(synthetic_videos(n))
+    rng = np.random.default_rng(SEED)
+    queries = [" ".join(rng.choice(ENGLISH, 3)) for _ in range(50)]
+    return lambda: [index.search(query, 10, 600, 3600) for query in queries], len(queries)
+
+
+# --- Measurement ---
+def measure(fn, items, min_time=MIN_TIME):
+    # Latency per call over at least MIN_REPEATS calls and min_time seconds,
+    # then one extra call under tracemalloc for the peak traced allocation
+    fn()
+    latencies = []
+    deadline = time.perf_counter() + min_time
+    while len(latencies) < MIN_REPEATS or (time.perf_counter() < deadline and len(latencies) < MAX_REPEATS):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "repeats": len(latencies),
+        "min": min(latencies),
+        "p50": p50,
+        "p95": p95,
+        "p99": p99,
+        "throughput": items / p50,
+        "peak_bytes": peak,
+    }
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    # Regression messages: best-case latency or peak memory beyond tolerance.
+    # The fastest call is compared because it is the least sensitive to
+    # other load on the machine; percentiles are reported alongside.
+    regressions = {}
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result["min"] > base["min"] * (1 + tolerance):
+            regressions[name] = (f"{name}: best {result['min'] * 1e3:.3f} ms vs baseline {base['min'] * 1e3:.3f} ms "
+                                 f"({result['min'] / base['min']:.2f}x)")
+        if result["peak_bytes"] > base["peak_bytes"] * (1 + tolerance) + MEMORY_SLACK:
+            regressions[name] = (f"{name}: peak {result['peak_bytes'] / 2**20:.1f} MiB vs baseline "
+                                 f"{base['peak_bytes'] / 2**20:.1f} MiB")
+    return regressions
+
+
+def _environment():
+    return {"python": platform.python_version(), "numpy": np.__version__, "machine": platform.machine(),
+            "processor": platform.processor() or platform.machine(), "cpus": os.cpu_count()}
+
+
+# --- CLI ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the LCA, pipe and video search hot paths")
+    parser.add_argument("-k", "--select", action="append", help="glob over case names (repeatable)")
+    parser.add_argument("--list", action="store_true", help="list case names and exit")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="allowed slowdown / memory growth")
+    parser.add_argument("--min-time", type=float, default=MIN_TIME, help="seconds of timed calls per case")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    names = [name for name in CASES if not args.select or any(fnmatch.fnmatch(name, p) for p in args.select)]
+    if args.list:
+        print("\n".join(names))
+        return 0
+    if metrics.enabled:
+        print("warning: metrics are enabled; timings include instrumentation", file=sys.stderr)
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            stored = json.load(f)
+        baseline = stored["results"]
+        if stored["environment"] != _environment():
+            print(f"warning: baseline was recorded on {stored['environment']}", file=sys.stderr)
+
+    print(f"{'case':34} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'items/s':>12} {'peak MiB':>9} {'best vs base':>13}")
+    results = {}
+    prepared = {}
+    for name in names:
+        setup, size = CASES[name]
+        fn, items = prepared[name] = setup(size)
+        result = results[name] = measure(fn, items, args.min_time)
+        ratio = f"{result['min'] / baseline[name]['min']:.2f}x" if name in baseline else "-"
+        print(f"{name:34} {result['p50'] * 1e3:10.3f} {result['p95'] * 1e3:10.3f} {result['p99'] * 1e3:10.3f} "
+              f"{result['throughput']:12,.0f} {result['peak_bytes'] / 2**20:9.1f} {ratio:>13}", flush=True)
+
+    regressions = compare(results, baseline, args.tolerance)
+    for _ in range(RETRIES):
+        if not regressions:
+            break
+        # A slow run is only a regression if re-measuring confirms it; each
+        # case keeps its best run
+        print(f"Re-measuring {len(regressions)} case(s) over tolerance", file=sys.stderr)
+        for name in regressions:
+            again = measure(*prepared[name], args.min_time)
+            results[name] = min(results[name], again, key=lambda result: result["min"])
+        regressions = compare(results, baseline, args.tolerance)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"environment": _environment(), "results": results}, f, indent=1)
+    if args.save_baseline:
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                results = {**json.load(f)["results"], **results}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"environment": _environment(), "results": results}, f, indent=1, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    for message in regressions.values():
+        print(f"REGRESSION {message}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
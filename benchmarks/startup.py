@@ -0,0 +1,85 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# --- Defaults ---
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APPS = ["app.py", "app. py", "app2.py", "app3.py", "app4.py"]
+# Wall time of one script run in a fresh interpreter (after streamlit itself
+# is imported), and of a second run in the same process (a widget rerun)
+COLD_BUDGET_MS = 400
+RERUN_BUDGET_MS = 50
+# Must not be imported until a batch file, an export or a report needs them
+DEFERRED = ("pandas", "pyarrow", "fpdf", "scipy")
+RUNS = 3
+
+PROBE = r"""
+import json, runpy, sys, time
+import streamlit
+start = time.perf_counter()
+runpy.run_path(sys.argv[1], run_name="__main__")
+cold = time.perf_counter() - start
+loaded = [name for name in sys.argv[2:] if name in sys.modules]
+start = time.perf_counter()
+runpy.run_path(sys.argv[1], run_name="__main__")
+rerun = time.perf_counter() - start
+print(json.dumps({"cold": cold, "rerun": rerun, "loaded": loaded}))
+"""
+
+
+# --- Measurement ---
+def probe(app):
+    # Bare-mode run (no server): widgets return their defaults, so this is
+    # exactly the work of a first page load
+    env = dict(os.environ, STREAMLIT_LOGGER_LEVEL="error", PYTHONPATH=ROOT)
+    out = subprocess.run([sys.executable, "-c", PROBE, app, *DEFERRED], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def measure(app, runs=RUNS):
+    # Best of `runs` fresh interpreters; loaded modules must match on every run
+    results = [probe(app) for _ in range(runs)]
+    return {
+        "cold_ms": min(r["cold"] for r in results) * 1000,
+        "rerun_ms": min(r["rerun"] for r in results) * 1000,
+        "loaded": sorted({name for r in results for name in r["loaded"]}),
+    }
+
+
+# --- CLI ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold-start and rerun budget for the LCA apps")
+    parser.add_argument("apps", nargs="*", default=APPS)
+    parser.add_argument("--cold-budget", type=float, default=COLD_BUDGET_MS, help="ms per cold script run")
+    parser.add_argument("--rerun-budget", type=float, default=RERUN_BUDGET_MS, help="ms per rerun")
+    parser.add_argument("--runs", type=int, default=RUNS)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = {app: measure(app, args.runs) for app in args.apps}
+    failures = []
+    for app, result in results.items():
+        if result["cold_ms"] > args.cold_budget:
+            failures.append(f"{app}: cold start {result['cold_ms']:.0f} ms > {args.cold_budget:.0f} ms")
+        if result["rerun_ms"] > args.rerun_budget:
+            failures.append(f"{app}: rerun {result['rerun_ms']:.1f} ms > {args.rerun_budget:.0f} ms")
+        if result["loaded"]:
+            failures.append(f"{app}: imports {', '.join(result['loaded'])} at startup")
+
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        print(f"{'app':<10} {'cold ms':>8} {'rerun ms':>9}  deferred imports")
+        for app, result in results.items():
+            print(f"{app:<10} {result['cold_ms']:>8.0f} {result['rerun_ms']:>9.1f}  {', '.join(result['loaded']) or '-'}")
+    for failure in failures:
+        print(f"BUDGET {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
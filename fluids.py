@@ -0,0 +1,144 @@
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# --- Defaults ---
+# data/fluid_properties.csv holds measured points (fluid, T in °C, rho in
+# kg/m³, mu in Pa·s): saturated liquid water from 0 to 200 °C (condensate
+# above 100 °C), NaCl brines and ethylene glycol-water by mass. Other fluids
+# are added as more rows.
+FLUIDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "fluid_properties.csv")
+DEFAULT_FLUID = "water"
+DEFAULT_T = 20.0
+STEP = 0.125  # °C between table rows; a power of two keeps grid temperatures exact
+
+
+# --- Tables ---
+class FluidCatalog:
+    # Density and viscosity of every fluid tabulated at `step` intervals over
+    # its measured range, stored back to back in two flat arrays: fluid k owns
+    # rows start[k]:start[k] + counts[k], beginning at T_min[k]. A lookup is
+    # linear interpolation on that regular grid, i.e. an index computation and
+    # two gathers per element whatever the mix of fluids.
+    def __init__(self, names, T_min, counts, rho, mu, step=STEP):
+        self.names = list(names)
+        self.step = float(step)
+        self.T_min = np.asarray(T_min, dtype=np.float64)
+        self.counts = np.asarray(counts, dtype=np.int64)
+        self.T_max = self.T_min + (self.counts - 1) * self.step
+        self.start = np.concatenate([[0], np.cumsum(self.counts)[:-1]])
+        self.rho = np.ascontiguousarray(rho, dtype=np.float64)
+        self.mu = np.ascontiguousarray(mu, dtype=np.float64)
+        self._index = pd.Index(self.names)
+
+    def code(self, fluid):
+        try:
+            return self.names.index(fluid)
+        except ValueError:
+            raise ValueError(f"Unknown fluid: {fluid}") from None
+
+    def codes(self, fluids):
+        # Factorized first: a column holds a handful of distinct names, and
+        # hashing into those beats matching every row against the catalog
+        inverse, uniques = pd.factorize(np.asarray(fluids, dtype=object))
+        lookup = self._index.get_indexer(uniques)
+        if (lookup < 0).any() or (inverse < 0).any():
+            unknown = sorted(map(str, uniques[lookup < 0])) + (["nan"] if (inverse < 0).any() else [])
+            raise ValueError(f"Unknown fluids: {', '.join(unknown[:10])}")
+        return lookup[inverse]
+
+    def range(self, fluid):
+        k = self.code(fluid)
+        return float(self.T_min[k]), float(self.T_max[k])
+
+    # --- Scalar ---
+    # Plain floats: cheaper than a numpy round trip for one pipe
+    def at(self, fluid, T):
+        k = self.code(fluid)
+        pos = (T - self.T_min[k]) / self.step
+        last = int(self.counts[k]) - 1
+        if not 0 <= pos <= last:
+            raise ValueError(f"{fluid}: {T:g} °C is outside {self.T_min[k]:g} to {self.T_max[k]:g} °C")
+        i = min(int(pos), last - 1)
+        w = pos - i
+        j = int(self.start[k]) + i
+        rho = self.rho[j] + w * (self.rho[j + 1] - self.rho[j])
+        mu = self.mu[j] + w * (self.mu[j + 1] - self.mu[j])
+        return float(rho), float(mu)
+
+    # --- Vectorized ---
+    def properties(self, fluid, T):
+        # (rho, mu) arrays for one fluid name or an array of names and
+        # temperatures in °C, broadcast together
+        T = np.asarray(T, dtype=np.float64)
+        if isinstance(fluid, str):
+            codes = np.full(T.shape, self.code(fluid))
+        else:
+            fluid = np.asarray(fluid, dtype=object)
+            codes = self.codes(fluid.ravel()).reshape(fluid.shape)
+        codes, T = np.broadcast_arrays(codes, T)
+        pos = (T - self.T_min[codes]) / self.step
+        last = self.counts[codes] - 1
+        outside = ~((pos >= 0) & (pos <= last))
+        if outside.any():
+            k = codes[outside].flat[0]
+            raise ValueError(f"{self.names[k]}: {T[outside].flat[0]:g} °C is outside "
+                             f"{self.T_min[k]:g} to {self.T_max[k]:g} °C")
+        i = np.minimum(pos.astype(np.int64), last - 1)
+        w = pos - i
+        j = self.start[codes] + i
+        rho = self.rho[j] + w * (self.rho[j + 1] - self.rho[j])
+        mu = self.mu[j] + w * (self.mu[j + 1] - self.mu[j])
+        return rho, mu
+
+
+# --- Loading ---
+def load_fluids(path=FLUIDS_PATH, step=STEP):
+    # Density is interpolated linearly between measured points and viscosity
+    # log-linearly (it falls roughly exponentially with temperature)
+    df = pd.read_csv(path)
+    for col in ("fluid", "T", "rho", "mu"):
+        if col not in df.columns:
+            raise ValueError(f"{path}: fluid table needs a {col} column")
+    names, T_min, counts, rho, mu = [], [], [], [], []
+    for name, points in df.groupby("fluid", sort=False):
+        points = points.sort_values("T")
+        T = points["T"].to_numpy(dtype=np.float64)
+        if len(T) < 2 or (np.diff(T) <= 0).any():
+            raise ValueError(f"{path}: {name} needs at least two distinct temperatures")
+        if (points["rho"] <= 0).any() or (points["mu"] <= 0).any():
+            raise ValueError(f"{path}: {name} has non-positive rho or mu")
+        grid = T[0] + np.arange(int((T[-1] - T[0]) / step + 1e-9) + 1) * step
+        names.append(str(name))
+        T_min.append(T[0])
+        counts.append(len(grid))
+        rho.append(np.interp(grid, T, points["rho"].to_numpy(dtype=np.float64)))
+        mu.append(np.exp(np.interp(grid, T, np.log(points["mu"].to_numpy(dtype=np.float64)))))
+    return FluidCatalog(names, T_min, counts, np.concatenate(rho), np.concatenate(mu), step)
+
+
+@lru_cache(maxsize=None)
+def _cached_fluids(path, mtime):
+    return load_fluids(path)
+
+
+def default_fluids(path=FLUIDS_PATH):
+    # Built once per process; editing the fluid file invalidates the tables
+    path = os.path.abspath(path)
+    return _cached_fluids(path, os.path.getmtime(path))
+
+
+# --- Frames ---
+def frame_properties(df, fluid=DEFAULT_FLUID, T=DEFAULT_T, catalog=None):
+    # Per-row (rho, mu) from optional fluid and T columns; rows without them
+    # (or with blank cells) use the given fluid and temperature
+    catalog = catalog or default_fluids()
+    if "fluid" in df.columns:
+        fluid = df["fluid"].fillna(fluid).astype(str).to_numpy(dtype=object)
+    temps = np.full(len(df), float(T))
+    if "T" in df.columns:
+        given = pd.to_numeric(df["T"], errors="coerce").to_numpy(dtype=np.float64)
+        temps = np.where(np.isnan(given), temps, given)
+    return catalog.properties(fluid, temps)
@@ -0,0 +1,117 @@
+import json
+import os
+from collections import deque
+from functools import lru_cache
+
+# --- Defaults ---
+KEYWORDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "keywords.json")
+
+
+# --- Matcher ---
+class KeywordMatcher:
+    # All keywords compiled into one Aho-Corasick automaton, so a text is
+    # scanned once whatever the number of terms. Each state carries a bitmask
+    # of the categories whose keywords end there (including via fail links).
+    #
+    # categories: list of {"name", "group", "weight", "keywords"}. Within a
+    # group the first matched category in list order wins and contributes its
+    # weight; the score is the sum over groups.
+    def __init__(self, categories):
+        self.categories = [c["name"] for c in categories]
+        self.groups = [c.get("group", c["name"]) for c in categories]
+        self.weights = [c.get("weight", 0) for c in categories]
+        self.full_mask = (1 << len(categories)) - 1
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [0]
+        for bit, category in enumerate(categories):
+            for keyword in category["keywords"]:
+                self._add(keyword.lower(), 1 << bit)
+        self._link()
+
+    def _add(self, keyword, mask):
+        state = 0
+        for ch in keyword:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(0)
+            state = nxt
+        self._out[state] |= mask
+
+    def _link(self):
+        # Breadth-first: a state's fail target is always shallower
+        pending = deque(self._goto[0].values())
+        while pending:
+            state = pending.popleft()
+            for ch, nxt in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0) if state else 0
+                self._out[nxt] |= self._out[self._fail[nxt]]
+                pending.append(nxt)
+
+    def scan(self, text):
+        # Bitmask of matched categories; stops early once all have matched
+        goto, fail, out = self._goto, self._fail, self._out
+        state = mask = 0
+        full = self.full_mask
+        for ch in text.lower():
+            nxt = goto[state].get(ch)
+            while nxt is None and state:
+                state = fail[state]
+                nxt = goto[state].get(ch)
+            state = nxt or 0
+            if out[state]:
+                mask |= out[state]
+                if mask == full:
+                    break
+        return mask
+
+    @property
+    def max_score(self):
+        # Best possible classify() score: the top weight of every group
+        best = {}
+        for group, weight in zip(self.groups, self.weights):
+            best[group] = max(best.get(group, weight), weight)
+        return sum(best.values())
+
+    def matches(self, text):
+        mask = self.scan(text)
+        return [name for bit, name in enumerate(self.categories) if mask >> bit & 1]
+
+    def classify(self, text):
+        # -> ({group: winning category}, score)
+        mask = self.scan(text)
+        groups = {}
+        score = 0
+        for bit, (name, group, weight) in enumerate(zip(self.categories, self.groups, self.weights)):
+            if mask >> bit & 1 and group not in groups:
+                groups[group] = name
+                score += weight
+        return groups, score
+
+
+# --- Loading ---
+def load_matcher(path=KEYWORDS_PATH):
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    for category in config["categories"]:
+        if "name" not in category or "keywords" not in category:
+            raise ValueError(f"{path}: every category needs a name and keywords")
+    return KeywordMatcher(config["categories"])
+
+
+@lru_cache(maxsize=None)
+def _cached_matcher(path, mtime):
+    return load_matcher(path)
+
+
+def default_matcher(path=KEYWORDS_PATH):
+    # Compiled once per process; editing the keyword file rebuilds it
+    path = os.path.abspath(path)
+    return _cached_matcher(path, os.path.getmtime(path))
@@ -0,0 +1,35 @@
+import importlib
+
+# --- Lazy Exports ---
+# `import lca` loads nothing else: each name below imports its submodule on
+# first access, and pandas, pyarrow, fpdf and scipy are only imported by the
+# code paths that use them (batch files, exports, reports, supply chain).
+_EXPORTS = {
+    "IMPACT_KEYS": "factor_registry",
+    "FactorRegistry": "factor_registry",
+    "default_registry": "factor_registry",
+    "compute_impacts": "core",
+    "impact_record": "core",
+    "impact_scores": "core",
+    "results_table": "core",
+    "calculate_records": "core",
+    "calculate_batch": "batch",
+    "read_batch_file": "batch",
+    "export_bytes": "export",
+    "write_export": "export",
+    "submit_report": "report",
+    "batch_report": "report",
+}
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *_EXPORTS})
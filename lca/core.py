@@ -0,0 +1,80 @@
+import numpy as np
+
+import metrics
+from .factor_registry import IMPACT_KEYS, default_registry
+
+# --- Display Labels ---
+METRIC_LABELS = ["CO₂ Emissions", "Water Use", "Energy Demand", "Acidification"]
+VALUE_FORMATS = ["{:.2f} kg", "{:.2f} m³", "{:.2f} MJ", "{:.4f} kg SO₂-eq"]
+
+
+# --- Scores ---
+def impact_scores(impacts):
+    # 1-10 banding per category, applied column-wise to (n x 4) impacts
+    impacts = np.asarray(impacts, dtype=np.float64)
+    raw = np.column_stack([
+        impacts[:, 0] / 2,
+        impacts[:, 1] / 2,
+        impacts[:, 2] / 50,
+        impacts[:, 3] * 100,
+    ])
+    return np.minimum(np.floor(raw).astype(np.int64) + 1, 10)
+
+
+# --- Single Calculation ---
+# Pure functions: no Streamlit calls, so the apps, the CLI and the HTTP
+# service all share the same numbers.
+def compute_impacts(registry, material, mat_amount, energy_type, energy_amount):
+    try:
+        with metrics.span("lca.calculate"):
+            return registry.impact(material, mat_amount, energy_type, energy_amount)
+    except KeyError as e:
+        raise ValueError(f"Unknown material or energy source: {e.args[0]}") from None
+
+
+def results_table(impacts):
+    # The Metric/Value/Score table every calculator displays. pandas is
+    # imported on the first calculation rather than at app start.
+    import pandas as pd
+
+    impacts = np.asarray(impacts, dtype=np.float64)
+    return pd.DataFrame({
+        "Metric": METRIC_LABELS,
+        "Value": [fmt.format(value) for fmt, value in zip(VALUE_FORMATS, impacts)],
+        "Score": impact_scores(impacts[None, :])[0].tolist(),
+    })
+
+
+def _amount(value, label):
+    # Numbers and numeric strings, as the batch path's pd.to_numeric accepts
+    try:
+        amount = float(value)
+    except (TypeError, ValueError):
+        amount = np.nan
+    if not (np.isfinite(amount) and amount >= 0):
+        raise ValueError(f"{label} must be a non-negative number")
+    return amount
+
+
+def impact_record(registry, material, mat_amount, energy_type, energy_amount):
+    mat_amount = _amount(mat_amount, "amount_kg")
+    energy_amount = _amount(energy_amount, "energy_kwh")
+    impacts = compute_impacts(registry, material, mat_amount, energy_type, energy_amount)
+    scores = impact_scores(impacts[None, :])[0]
+    record = {"material": material, "amount_kg": mat_amount, "energy_source": energy_type, "energy_kwh": energy_amount}
+    record.update({key: float(value) for key, value in zip(IMPACT_KEYS, impacts)})
+    record.update({f"{key}_score": int(score) for key, score in zip(IMPACT_KEYS, scores)})
+    return record
+
+
+# --- Batch Calculation ---
+def calculate_records(records, registry=None):
+    # records: list of dicts with the batch columns -> result DataFrame
+    import pandas as pd
+
+    from .batch import BATCH_COLUMNS, calculate_batch
+
+    registry = registry or default_registry()
+    if isinstance(records, dict):
+        records = [records]
+    return calculate_batch(pd.DataFrame.from_records(records, columns=BATCH_COLUMNS), registry)
@@ -0,0 +1,98 @@
+import tempfile
+import zlib
+
+import metrics
+
+# --- Formats ---
+CHUNK_ROWS = 100_000
+SPOOL_BYTES = 8 * 1024 * 1024
+EXPORT_FORMATS = {
+    # format: (extension, mime, supported compression, default compression)
+    "csv": ("csv", "text/csv", [None, "gzip"], None),
+    "parquet": ("parquet", "application/vnd.apache.parquet", [None, "snappy", "zstd", "gzip"], "snappy"),
+    "arrow": ("arrow", "application/vnd.apache.arrow.file", [None, "lz4", "zstd"], None),
+}
+
+
+# --- CSV ---
+def iter_csv_chunks(df, chunk_rows=CHUNK_ROWS, compression=None):
+    # Each slice goes through pandas' C writer, so no Python runs per row.
+    # Only one chunk of text is alive at a time.
+    compressor = zlib.compressobj(wbits=31) if compression == "gzip" else None
+    for start in range(0, max(len(df), 1), chunk_rows):
+        text = df.iloc[start:start + chunk_rows].to_csv(index=False, header=start == 0)
+        data = text.encode("utf-8")
+        yield compressor.compress(data) if compressor else data
+    if compressor:
+        yield compressor.flush()
+
+
+def _write_csv(df, out, compression, chunk_rows):
+    for data in iter_csv_chunks(df, chunk_rows, compression):
+        out.write(data)
+
+
+# --- Columnar ---
+# pyarrow is imported by the writers themselves, so only Parquet/Arrow
+# exports pay for it
+def _write_parquet(df, out, compression, chunk_rows):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.Schema.from_pandas(df.iloc[:0], preserve_index=False)
+    with pq.ParquetWriter(out, schema, compression=compression or "none") as writer:
+        for start in range(0, len(df), chunk_rows):
+            chunk = pa.Table.from_pandas(df.iloc[start:start + chunk_rows], schema=schema, preserve_index=False)
+            writer.write_table(chunk, row_group_size=chunk_rows)
+
+
+def _write_arrow(df, out, compression, chunk_rows):
+    import pyarrow as pa
+
+    schema = pa.Schema.from_pandas(df.iloc[:0], preserve_index=False)
+    options = pa.ipc.IpcWriteOptions(compression=compression)
+    with pa.ipc.new_file(out, schema, options=options) as writer:
+        for start in range(0, len(df), chunk_rows):
+            writer.write_batch(pa.RecordBatch.from_pandas(df.iloc[start:start + chunk_rows], schema=schema,
+                                                          preserve_index=False))
+
+
+_WRITERS = {"csv": _write_csv, "parquet": _write_parquet, "arrow": _write_arrow}
+
+
+# --- Export ---
+def write_export(df, out, fmt="csv", compression=None, chunk_rows=CHUNK_ROWS):
+    # out is a path or a binary file object
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if compression not in EXPORT_FORMATS[fmt][2]:
+        raise ValueError(f"{fmt} does not support {compression} compression")
+    with metrics.span("lca.export", format=fmt):
+        if isinstance(out, str):
+            with open(out, "wb") as f:
+                _WRITERS[fmt](df, f, compression, chunk_rows)
+        else:
+            _WRITERS[fmt](df, out, compression, chunk_rows)
+
+
+def export_type(fmt="csv", compression=None):
+    # File extension and MIME type for a format/compression pair
+    if fmt == "csv" and compression == "gzip":
+        return "csv.gz", "application/gzip"
+    return EXPORT_FORMATS[fmt][0], EXPORT_FORMATS[fmt][1]
+
+
+def export_file(df, fmt="csv", compression=None, chunk_rows=CHUNK_ROWS):
+    # Small exports stay in memory; large ones spill to disk. Returns a file
+    # object rewound to the start, plus the file extension and MIME type.
+    extension, mime = export_type(fmt, compression)
+    out = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+    write_export(df, out, fmt, compression, chunk_rows)
+    out.seek(0)
+    return out, extension, mime
+
+
+def export_bytes(df, fmt="csv", compression=None):
+    out, _, _ = export_file(df, fmt, compression)
+    with out:
+        return out.read()
@@ -0,0 +1,119 @@
+import csv
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+
+# --- Defaults ---
+IMPACT_KEYS = ["co2", "water", "energy", "acidification"]
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+FACTORS_PATH = os.path.join(DATA_DIR, "impact_factors.csv")
+MMAP_THRESHOLD_BYTES = 64 * 1024 * 1024
+
+
+# --- Registry ---
+class FactorRegistry:
+    # Factors are one contiguous (rows x categories) array; each kind
+    # ("material", "energy", ...) owns a contiguous block of rows.
+    def __init__(self, kinds, names, categories, values):
+        self.categories = list(categories)
+        self.values = values
+        self.category_index = {key: i for i, key in enumerate(self.categories)}
+        self._names = {}
+        self._index = {}
+        self._slices = {}
+        start = 0
+        for kind in dict.fromkeys(kinds):
+            block = [name for k, name in zip(kinds, names) if k == kind]
+            self._names[kind] = block
+            self._index[kind] = {name: start + i for i, name in enumerate(block)}
+            self._slices[kind] = slice(start, start + len(block))
+            start += len(block)
+
+    def names(self, kind):
+        return self._names.get(kind, [])
+
+    def row(self, kind, name):
+        return self._index[kind][name]
+
+    def rows(self, kind):
+        return self._slices[kind]
+
+    def matrix(self, kind, categories=IMPACT_KEYS):
+        block = self.values[self._slices[kind]]
+        return block[:, self.columns(categories)]
+
+    def columns(self, categories=IMPACT_KEYS):
+        if list(categories) == self.categories:
+            return slice(None)
+        return [self.category_index[key] for key in categories]
+
+    def impact(self, material, mat_amount, energy_type, energy_amount, categories=IMPACT_KEYS):
+        cols = self.columns(categories)
+        mat_row = self.values[self.row("material", material)][cols]
+        energy_row = self.values[self.row("energy", energy_type)][cols]
+        return mat_row * mat_amount + energy_row * energy_amount
+
+
+# --- Loading ---
+def _cache_paths(path):
+    stem = os.path.splitext(path)[0]
+    return stem + ".values.npy", stem + ".index.json"
+
+
+def _parse_csv(path):
+    # csv + numpy rather than pandas: the registry is loaded on every cold
+    # start, and importing pandas costs far more than parsing the file
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        rows = [row for row in reader if row]
+    if "kind" not in header or "name" not in header:
+        raise ValueError(f"{path}: factor file needs 'kind' and 'name' columns")
+    kind_col, name_col = header.index("kind"), header.index("name")
+    value_cols = [i for i, col in enumerate(header) if col not in ("kind", "name")]
+    # Group rows by kind so each kind becomes one contiguous block
+    blocks = {}
+    for row in rows:
+        blocks.setdefault(row[kind_col], []).append(row)
+    rows = [row for block in blocks.values() for row in block]
+    try:
+        values = np.array([[row[i] or "nan" for i in value_cols] for row in rows], dtype=np.float64)
+    except (IndexError, ValueError) as e:
+        raise ValueError(f"{path}: {e}") from None
+    values = np.ascontiguousarray(values.reshape(len(rows), len(value_cols)))
+    return [row[kind_col] for row in rows], [row[name_col] for row in rows], [header[i] for i in value_cols], values
+
+
+def load_registry(path=FACTORS_PATH, mmap_threshold=MMAP_THRESHOLD_BYTES):
+    values_path, index_path = _cache_paths(path)
+    source_mtime = os.path.getmtime(path)
+
+    if os.path.exists(values_path) and os.path.getmtime(values_path) >= source_mtime:
+        with open(index_path, encoding="utf-8") as f:
+            index = json.load(f)
+        mmap_mode = "r" if os.path.getsize(values_path) >= mmap_threshold else None
+        values = np.load(values_path, mmap_mode=mmap_mode)
+        return FactorRegistry(index["kinds"], index["names"], index["categories"], values)
+
+    kinds, names, categories, values = _parse_csv(path)
+    if values.nbytes >= mmap_threshold:
+        # Large inventories are parsed once, then memory-mapped by every later process
+        with open(index_path, "w", encoding="utf-8") as f:
+            json.dump({"kinds": kinds, "names": names, "categories": categories}, f)
+        np.save(values_path, values)
+        values = np.load(values_path, mmap_mode="r")
+    return FactorRegistry(kinds, names, categories, values)
+
+
+@lru_cache(maxsize=None)
+def _cached_registry(path, mtime):
+    return load_registry(path)
+
+
+def default_registry(path=FACTORS_PATH):
+    # Built once per process and shared across Streamlit reruns and sessions;
+    # editing the factor file invalidates the cached table.
+    path = os.path.abspath(path)
+    return _cached_registry(path, os.path.getmtime(path))
@@ -0,0 +1,110 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from .factor_registry import IMPACT_KEYS
+
+# --- Calendar ---
+HOURS_PER_YEAR = 8760
+MONTH_DAYS = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+MONTH_STARTS = np.concatenate([[0], np.cumsum(MONTH_DAYS)[:-1]]) * 24
+CHUNK_FACILITIES = 256
+
+
+# --- Profile Storage ---
+# Profiles are (facilities x hours) float32 .npy files opened memory-mapped,
+# so only the chunk being reduced is paged in.
+def load_profiles(path):
+    profiles = np.load(path, mmap_mode="r")
+    if profiles.ndim == 1:
+        profiles = profiles[None, :]
+    return profiles
+
+
+def csv_to_profiles(csv_source, npy_path, chunksize=CHUNK_FACILITIES):
+    # Wide CSV: facility, h0 ... h8759 -> facility names + memory-mapped .npy.
+    # The facility count is only known at the end, so rows are spilled to a
+    # raw file first and the .npy header is written in front of them.
+    names = []
+    hours = None
+    raw_path = npy_path + ".raw"
+    with open(raw_path, "wb") as raw:
+        for chunk in pd.read_csv(csv_source, chunksize=chunksize):
+            if hours is None:
+                hours = chunk.shape[1] - 1
+            elif chunk.shape[1] - 1 != hours:
+                raise ValueError("All facilities must have the same number of hours")
+            names.extend(chunk.iloc[:, 0].astype(str))
+            chunk.iloc[:, 1:].to_numpy(dtype="<f4").tofile(raw)
+
+    header = {"descr": "<f4", "fortran_order": False, "shape": (len(names), hours)}
+    with open(npy_path, "wb") as out, open(raw_path, "rb") as raw:
+        np.lib.format.write_array_header_2_0(out, header)
+        shutil.copyfileobj(raw, out, 16 * 1024 * 1024)
+    os.remove(raw_path)
+    return names, load_profiles(npy_path)
+
+
+def load_intensity(source):
+    # Single-column CSV/array of kg CO2 per kWh, one value per hour
+    if isinstance(source, np.ndarray):
+        return source.astype(np.float64, copy=False)
+    df = pd.read_csv(source)
+    column = "intensity" if "intensity" in df.columns else df.columns[-1]
+    return df[column].to_numpy(dtype=np.float64)
+
+
+# --- Hourly Impacts ---
+def hourly_co2(consumption, intensity):
+    # kWh (facilities x hours) * kg CO2/kWh (hours,) -> kg CO2 per hour
+    return np.asarray(consumption, dtype=np.float64) * intensity
+
+
+def facility_summary(profiles, intensity, names=None, registry=None, energy_type=None,
+                     chunk=CHUNK_FACILITIES):
+    # Chunked reduction over facilities: peak memory is one chunk of hours
+    n, hours = profiles.shape
+    if len(intensity) != hours:
+        raise ValueError(f"Intensity has {len(intensity)} hours, consumption has {hours}")
+
+    kwh = np.empty(n)
+    co2 = np.empty(n)
+    peak = np.empty(n)
+    peak_hour = np.empty(n, dtype=np.int64)
+    for start in range(0, n, chunk):
+        block = np.asarray(profiles[start:start + chunk], dtype=np.float64)
+        hourly = block * intensity
+        kwh[start:start + chunk] = block.sum(axis=1)
+        co2[start:start + chunk] = hourly.sum(axis=1)
+        peak_hour[start:start + chunk] = hourly.argmax(axis=1)
+        peak[start:start + chunk] = hourly.max(axis=1)
+
+    summary = pd.DataFrame({
+        "facility": names if names is not None else np.arange(n),
+        "energy_kwh": kwh,
+        "co2": co2,
+        "avg_intensity": np.divide(co2, kwh, out=np.zeros(n), where=kwh > 0),
+        "peak_hour": peak_hour,
+        "peak_co2": peak,
+    })
+
+    # Remaining categories keep the annual factor of the chosen energy source
+    if registry is not None and energy_type is not None:
+        factors = registry.values[registry.row("energy", energy_type)]
+        for key in IMPACT_KEYS:
+            if key != "co2":
+                summary[key] = kwh * factors[registry.category_index[key]]
+    return summary
+
+
+def monthly_co2(profiles, intensity, chunk=CHUNK_FACILITIES):
+    # (facilities x 12) kg CO2, via reduceat over month boundaries
+    n, hours = profiles.shape
+    starts = MONTH_STARTS[MONTH_STARTS < hours]
+    out = np.empty((n, len(starts)))
+    for start in range(0, n, chunk):
+        hourly = np.asarray(profiles[start:start + chunk], dtype=np.float64) * intensity
+        out[start:start + chunk] = np.add.reduceat(hourly, starts, axis=1)
+    return out
@@ -0,0 +1,230 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+
+import metrics
+
+# --- Layout ---
+PAGE_TOP = 20
+PAGE_BOTTOM = 285
+LEFT = 15
+LINE_HEIGHT = 4.5
+TABLE_WIDTHS = [22, 22, 8]
+CACHE_BYTES = 64 * 1024 * 1024
+# Batch reports stop here (~2.5 s and ~7 MB); the results download has every lot
+MAX_REPORT_LOTS = 50_000
+METRICS = ["CO2 Emissions", "Water Use", "Energy Demand", "Acidification"]
+UNITS = [("kg", 2), ("m3", 2), ("MJ", 2), ("kg SO2-eq", 4)]
+LATIN1 = str.maketrans({"₂": "2", "₃": "3", "³": "3"})
+
+
+def _latin1(text):
+    return str(text).translate(LATIN1).encode("latin1", errors="replace").decode("latin1")
+
+
+# --- Sections ---
+# A section is (heading, table lines). Table lines are pre-formatted
+# fixed-width strings, so the PDF loop emits one text op per row.
+def _table_header():
+    return ["Metric".ljust(TABLE_WIDTHS[0]) + "Value".rjust(TABLE_WIDTHS[1]) + "Score".rjust(TABLE_WIDTHS[2])]
+
+
+def scenario_section(material, mat_amount, energy_type, energy_amount, results_df):
+    heading = [f"Material: {material} ({mat_amount} kg)", f"Energy: {energy_type} ({energy_amount} kWh)"]
+    rows = [
+        _latin1(metric)[:TABLE_WIDTHS[0]].ljust(TABLE_WIDTHS[0])
+        + _latin1(value).rjust(TABLE_WIDTHS[1])
+        + f"{score}/10".rjust(TABLE_WIDTHS[2])
+        for metric, value, score in zip(results_df.iloc[:, 0], results_df["Value"], results_df["Score"])
+    ]
+    return heading, _table_header() + rows
+
+
+def batch_sections(results_df, max_lots=MAX_REPORT_LOTS):
+    # One section per batch row, up to max_lots; strings for every row are
+    # built column-wise
+    import numpy as np
+    import pandas as pd
+
+    skipped = max(len(results_df) - max_lots, 0)
+    results_df = results_df.iloc[:max_lots]
+    n = len(results_df)
+    headings = (
+        "Lot " + pd.Series(np.arange(1, n + 1)).astype(str) + ": "
+        + results_df["material"].astype(str) + " (" + results_df["amount_kg"].round(3).astype(str) + " kg), "
+        + results_df["energy_source"].astype(str) + " (" + results_df["energy_kwh"].round(3).astype(str) + " kWh)"
+    ).tolist()
+    columns = []
+    for metric, key, (unit, digits) in zip(METRICS, ["co2", "water", "energy", "acidification"], UNITS):
+        values = np.char.rjust(np.char.mod(f"%.{digits}f {unit}", results_df[key].to_numpy()), TABLE_WIDTHS[1])
+        scores = np.char.rjust(np.char.add(results_df[f"{key}_score"].to_numpy().astype(str), "/10"), TABLE_WIDTHS[2])
+        columns.append(np.char.add(np.char.add(metric.ljust(TABLE_WIDTHS[0]), values), scores))
+    header = _table_header()
+    for i in range(n):
+        yield [headings[i]], header + [col[i] for col in columns]
+    if skipped:
+        yield [f"{skipped} more lots not shown; download the batch results for every lot."], []
+
+
+# --- Rendering ---
+class _Buffer:
+    # Stands in for FPDF.buffer. fpdf appends to it with +=, which on an
+    # attribute copies the whole document each time (quadratic in report
+    # size); parts are kept in a list instead. len() is all fpdf reads back.
+    __slots__ = ("parts", "size")
+
+    def __init__(self):
+        self.parts = []
+        self.size = 0
+
+    def __iadd__(self, text):
+        self.parts.append(text)
+        self.size += len(text)
+        return self
+
+    def __len__(self):
+        return self.size
+
+    def encode(self, encoding):
+        return "".join(self.parts).encode(encoding)
+
+
+def render_sections(title, sections):
+    # fpdf is loaded by the first report
+    from fpdf import FPDF
+
+    pdf = FPDF()
+    pdf.buffer = _Buffer()
+    pdf.set_auto_page_break(False)
+    pdf.add_page()
+    pdf.set_font("Arial", "B", 14)
+    pdf.cell(0, 10, txt=_latin1(title), ln=1, align="C")
+    y = PAGE_TOP + 10
+
+    for heading, lines in sections:
+        needed = (len(heading) + len(lines) + 1) * LINE_HEIGHT
+        if y + needed > PAGE_BOTTOM:
+            pdf.add_page()
+            y = PAGE_TOP
+        pdf.set_font("Arial", "", 11)
+        for text in heading:
+            y += LINE_HEIGHT
+            pdf.text(LEFT, y, _latin1(text))
+        pdf.set_font("Courier", "", 9)
+        for text in lines:
+            y += LINE_HEIGHT
+            pdf.text(LEFT, y, text)
+        pdf.line(LEFT, y + 1.5, LEFT + 120, y + 1.5)
+        y += LINE_HEIGHT
+    return pdf.output(dest="S").encode("latin1")
+
+
+# --- Cache ---
+class ReportCache:
+    # LRU over finished PDF bytes, bounded by total size
+    def __init__(self, max_bytes=CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._items.get(key)
+            if data is not None:
+                self._items.move_to_end(key)
+            return data
+
+    def put(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._items:
+                self.size -= len(self._items.pop(key))
+            self._items[key] = data
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, old = self._items.popitem(last=False)
+                self.size -= len(old)
+
+
+def report_key(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        if hasattr(part, "columns"):
+            # A DataFrame, so pandas is already loaded
+            import pandas as pd
+
+            digest.update(pd.util.hash_pandas_object(part, index=False).to_numpy().tobytes())
+            digest.update(json.dumps(list(map(str, part.columns))).encode())
+        else:
+            digest.update(json.dumps(part, default=str).encode())
+    return digest.hexdigest()
+
+
+# --- Background Renderer ---
+class ReportRenderer:
+    # submit() renders on a worker thread so the Streamlit script thread only
+    # waits when the user actually downloads; identical requests share one
+    # job. render() builds on the calling thread, for reports too large to
+    # queue ahead of everyone else's on the shared worker.
+    def __init__(self, cache=None, workers=1):
+        self.cache = cache or ReportCache()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="lca-report")
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, build):
+        data = self.cache.get(key)
+        metrics.count("lca_report_requests_total", result="cached" if data is not None else "miss")
+        if data is not None:
+            future = Future()
+            future.set_result(data)
+            return future
+        with self._lock:
+            if key in self._pending:
+                return self._pending[key]
+            future = self._pool.submit(self._render, key, build)
+            self._pending[key] = future
+            return future
+
+    def render(self, key, build):
+        data = self.cache.get(key)
+        metrics.count("lca_report_requests_total", result="cached" if data is not None else "miss")
+        return data if data is not None else self._build(key, build)
+
+    def _build(self, key, build):
+        with metrics.span("lca.create_pdf"):
+            data = build()
+        self.cache.put(key, data)
+        return data
+
+    def _render(self, key, build):
+        try:
+            return self._build(key, build)
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+
+@lru_cache(maxsize=None)
+def default_renderer():
+    return ReportRenderer()
+
+
+def submit_report(material, mat_amount, energy_type, energy_amount, results_df, renderer=None):
+    renderer = renderer or default_renderer()
+    key = report_key("single", material, mat_amount, energy_type, energy_amount, results_df)
+    section = scenario_section(material, mat_amount, energy_type, energy_amount, results_df)
+    return renderer.submit(key, lambda: render_sections("LCA Calculation Report", [section]))
+
+
+def batch_report(results_df, renderer=None, max_lots=MAX_REPORT_LOTS):
+    # PDF bytes, built on the caller's thread: call it from the download
+    # button so nothing is rendered until someone asks for the report
+    renderer = renderer or default_renderer()
+    key = report_key("batch", max_lots, results_df)
+    return renderer.render(key, lambda: render_sections("LCA Batch Report", batch_sections(results_df, max_lots)))
@@ -0,0 +1,170 @@
+import argparse
+import io
+import json
+import shutil
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+import metrics
+from .factor_registry import FACTORS_PATH, default_registry
+from .batch import BATCH_COLUMNS, calculate_batch, read_batch_file
+from .core import calculate_records, impact_record
+from .export import EXPORT_FORMATS, export_file, write_export
+
+# --- Defaults ---
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+
+# --- HTTP Service ---
+class LCARequestHandler(BaseHTTPRequestHandler):
+    # POST /calculate with a JSON object, a JSON list / {"rows": [...]} or a
+    # CSV body (Content-Type: text/csv). Replies in CSV when the client sends
+    # Accept: text/csv, otherwise JSON records. POST /calculate?profile=1
+    # writes a cProfile dump of that request when profiling is configured;
+    # GET /metrics serves the metrics when they are enabled.
+    protocol_version = "HTTP/1.1"
+    # Keep-alive clients would otherwise stall on delayed ACKs between the
+    # header and body writes
+    disable_nagle_algorithm = True
+    wbufsize = -1
+    registry = None
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send(200, b'{"status": "ok"}', "application/json")
+        elif self.path == "/metrics" and metrics.enabled:
+            self._send(200, metrics.render().encode("utf-8"), "text/plain; version=0.0.4")
+        else:
+            self._send_error(404, "Not found")
+
+    def do_POST(self):
+        path, _, query = self.path.partition("?")
+        if path != "/calculate":
+            self._send_error(404, "Not found")
+            return
+        with metrics.profile("lca.request", "profile=1" in query.split("&")), metrics.span("lca.request"):
+            self._calculate()
+
+    def _calculate(self):
+        # A body that is not read leaves the connection out of step with the
+        # client, so those replies close it
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self._send_error(400, "Invalid Content-Length", close=True)
+            return
+        if length > MAX_BODY_BYTES:
+            self._send_error(413, "Request body too large", close=True)
+            return
+        body = self.rfile.read(length)
+        try:
+            if self.headers.get("Content-Type", "").startswith("text/csv"):
+                results = calculate_batch(pd.read_csv(io.BytesIO(body)), self.registry)
+            else:
+                payload = json.loads(body or b"{}")
+                if isinstance(payload, dict) and "rows" in payload:
+                    payload = payload["rows"]
+                elif isinstance(payload, dict):
+                    # Single pair: skip the DataFrame round trip entirely
+                    record = impact_record(self.registry, *(payload[col] for col in BATCH_COLUMNS))
+                    self._send(200, json.dumps({"results": [record]}).encode("utf-8"), "application/json")
+                    return
+                results = calculate_records(payload, self.registry)
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_error(400, str(e))
+            return
+
+        if "text/csv" in self.headers.get("Accept", ""):
+            out = io.BytesIO()
+            write_export(results, out, "csv")
+            self._send(200, out.getvalue(), "text/csv")
+        else:
+            data = results.to_json(orient="records").encode("utf-8")
+            self._send(200, b'{"results": ' + data + b"}", "application/json")
+
+    def _send(self, status, data, content_type, close=False):
+        metrics.count("lca_requests_total", status=status)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        if close:
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, status, message, close=False):
+        self._send(status, json.dumps({"error": message}).encode("utf-8"), "application/json", close)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(host=DEFAULT_HOST, port=DEFAULT_PORT, registry=None):
+    # Factors are loaded once when the server starts, not per request
+    handler = type("Handler", (LCARequestHandler,), {"registry": registry or default_registry()})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+# --- CLI ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Chemical process LCA calculator")
+    parser.add_argument("--factors", default=FACTORS_PATH, help="impact factor CSV")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    calc = commands.add_parser("calc", help="calculate a single material/energy pair")
+    calc.add_argument("--material", required=True)
+    calc.add_argument("--kg", type=float, required=True)
+    calc.add_argument("--energy", required=True)
+    calc.add_argument("--kwh", type=float, required=True)
+
+    batch = commands.add_parser("batch", help="calculate every row of a CSV/Parquet file")
+    batch.add_argument("input")
+    batch.add_argument("-o", "--output", help="output path (default: stdout)")
+    batch.add_argument("--format", choices=list(EXPORT_FORMATS), default="csv")
+    batch.add_argument("--compression", default=None)
+
+    serve = commands.add_parser("serve", help="run the local HTTP endpoint")
+    serve.add_argument("--host", default=DEFAULT_HOST)
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+
+    args = parser.parse_args(argv)
+    registry = default_registry(args.factors)
+
+    try:
+        if args.command == "calc":
+            record = impact_record(registry, args.material, args.kg, args.energy, args.kwh)
+            json.dump(record, sys.stdout, indent=2)
+            sys.stdout.write("\n")
+        elif args.command == "batch":
+            results = calculate_batch(read_batch_file(args.input), registry)
+            if args.output:
+                write_export(results, args.output, args.format, args.compression)
+            else:
+                # Spooled first: the columnar writers need a seekable file
+                out, _, _ = export_file(results, args.format, args.compression)
+                with out:
+                    shutil.copyfileobj(out, sys.stdout.buffer)
+        elif args.command == "serve":
+            server = make_server(args.host, args.port, registry)
+            print(f"Serving LCA calculations on http://{args.host}:{args.port}/calculate")
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            finally:
+                server.server_close()
+    except (KeyError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+import os
+from functools import cached_property, lru_cache
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.linalg import splu
+
+from .factor_registry import DATA_DIR, FACTORS_PATH, IMPACT_KEYS, default_registry
+
+# --- Defaults ---
+EXCHANGES_PATH = os.path.join(DATA_DIR, "process_exchanges.csv")
+
+
+# --- Technology Model ---
+class SupplyChainModel:
+    # A = I - T, where T[i, j] is the amount of process i consumed per unit
+    # output of process j. Scaling vector s solves A s = f for a demand f;
+    # cradle-to-gate impacts are B^T s with B the direct burdens per process.
+    # The LU defaults (COLAMD ordering, partial pivoting) are safe for any
+    # nonsingular A. permc_spec="NATURAL", diag_pivot_thresh=0.0 is a faster
+    # opt-in for diagonally dominant matrices with processes listed
+    # upstream-first; on others it can lose accuracy or fail.
+    def __init__(self, processes, technology, burdens, categories=IMPACT_KEYS, permc_spec="COLAMD",
+                 diag_pivot_thresh=1.0):
+        self.permc_spec = permc_spec
+        self.diag_pivot_thresh = diag_pivot_thresh
+        self.processes = list(processes)
+        self.index = {name: i for i, name in enumerate(self.processes)}
+        self.technology = sparse.csc_matrix(technology)
+        self.burdens = np.asarray(burdens, dtype=np.float64)
+        self.categories = list(categories)
+
+    @cached_property
+    def lu(self):
+        # Factor once; every demand vector afterwards is two triangular solves
+        try:
+            return splu(self.technology, permc_spec=self.permc_spec, diag_pivot_thresh=self.diag_pivot_thresh)
+        except RuntimeError as e:
+            raise ValueError(f"Technology matrix is singular: {e}") from e
+
+    @cached_property
+    def intensities(self):
+        # Cradle-to-gate factor per unit output: A^-T B, one solve per category
+        return self.lu.solve(self.burdens, trans="T")
+
+    def demand_matrix(self, demands):
+        # Accepts {process: amount} or a list of them, one column per scenario
+        if isinstance(demands, dict):
+            demands = [demands]
+        F = np.zeros((len(self.processes), len(demands)))
+        for j, demand in enumerate(demands):
+            for name, amount in demand.items():
+                if name not in self.index:
+                    raise ValueError(f"Unknown process: {name}")
+                F[self.index[name], j] += amount
+        return F
+
+    def scaling(self, demands):
+        F = demands if isinstance(demands, np.ndarray) else self.demand_matrix(demands)
+        return self.lu.solve(F)
+
+    def solve(self, demands):
+        F = demands if isinstance(demands, np.ndarray) else self.demand_matrix(demands)
+        return F.T @ self.intensities
+
+    def contributions(self, demand):
+        # Per-process share of the total for a single demand vector
+        s = self.scaling(demand)[:, 0]
+        return pd.DataFrame(self.burdens * s[:, None], index=self.processes, columns=self.categories)
+
+
+# --- Loading ---
+def load_model(registry, exchanges_path=EXCHANGES_PATH, categories=IMPACT_KEYS):
+    processes = registry.names("process")
+    index = {name: i for i, name in enumerate(processes)}
+    exchanges = pd.read_csv(exchanges_path)
+
+    unknown = sorted(set(exchanges["process"]).union(exchanges["input"]) - set(index))
+    if unknown:
+        raise ValueError(f"Exchanges reference unknown processes: {', '.join(unknown[:10])}")
+
+    n = len(processes)
+    rows = exchanges["input"].map(index).to_numpy()
+    cols = exchanges["process"].map(index).to_numpy()
+    T = sparse.coo_matrix((exchanges["amount"].to_numpy(dtype=np.float64), (rows, cols)), shape=(n, n))
+    A = (sparse.identity(n, format="csc") - T.tocsc()).tocsc()
+    return SupplyChainModel(processes, A, registry.matrix("process", categories), categories)
+
+
+def scenarios_from_frame(scenarios_df):
+    # Long format: scenario, process, amount_kg -> list of demand dicts
+    missing = [col for col in ("scenario", "process", "amount_kg") if col not in scenarios_df.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+    names = list(dict.fromkeys(scenarios_df["scenario"]))
+    grouped = scenarios_df.groupby("scenario", sort=False)
+    return names, [dict(zip(group["process"], group["amount_kg"])) for _, group in grouped]
+
+
+@lru_cache(maxsize=None)
+def _cached_model(factors_path, exchanges_path, factors_mtime, exchanges_mtime):
+    return load_model(default_registry(factors_path), exchanges_path)
+
+
+def default_model(factors_path=FACTORS_PATH, exchanges_path=EXCHANGES_PATH):
+    # Shared per process like the factor registry, so the LU factorization
+    # survives Streamlit reruns until either data file changes
+    factors_path = os.path.abspath(factors_path)
+    exchanges_path = os.path.abspath(exchanges_path)
+    return _cached_model(
+        factors_path,
+        exchanges_path,
+        os.path.getmtime(factors_path),
+        os.path.getmtime(exchanges_path),
+    )
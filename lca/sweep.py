@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+
+from .factor_registry import IMPACT_KEYS
+from .uncertainty import DISTRIBUTIONS
+
+# --- Defaults ---
+MAX_TABLE_ROWS = 1_000_000
+CHUNK_POINTS = 1 << 20  # grid points evaluated at once by sweep_summary
+Z_90 = 1.6449
+
+
+# --- Full-Factorial Grid ---
+def _pair_factors(registry, materials, energies, category):
+    col = registry.category_index[category]
+    mat = registry.values[[registry.row("material", name) for name in materials], col]
+    eng = registry.values[[registry.row("energy", name) for name in energies], col]
+    return mat, eng
+
+
+def sweep_grid(registry, materials, energies, kg_values, kwh_values, category):
+    # Result[m, e, k, h] = material factor * kg + energy factor * kWh, evaluated
+    # by broadcasting, so no Python loop runs over grid points. Holds every
+    # point; sweep_summary covers grids too large for that.
+    mat, eng = _pair_factors(registry, materials, energies, category)
+    kg = np.asarray(kg_values, dtype=np.float64)
+    kwh = np.asarray(kwh_values, dtype=np.float64)
+    return (mat[:, None, None, None] * kg[None, None, :, None]
+            + eng[None, :, None, None] * kwh[None, None, None, :])
+
+
+def sweep_summary(registry, materials, energies, kg_values, kwh_values, category):
+    # Min, mean and max over the amount x energy plane per material/energy
+    # pair. Evaluated one pair and a block of amounts at a time, so memory
+    # stays at CHUNK_POINTS whatever the size of the grid.
+    mat, eng = _pair_factors(registry, materials, energies, category)
+    kg = np.asarray(kg_values, dtype=np.float64)
+    kwh = np.asarray(kwh_values, dtype=np.float64)
+    rows = max(CHUNK_POINTS // max(len(kwh), 1), 1)
+    records = []
+    for i, material in enumerate(materials):
+        for j, energy in enumerate(energies):
+            low, high, total = np.inf, -np.inf, 0.0
+            for start in range(0, len(kg), rows):
+                block = mat[i] * kg[start:start + rows, None] + eng[j] * kwh[None, :]
+                low, high, total = min(low, block.min()), max(high, block.max()), total + block.sum()
+            records.append((material, energy, low, total / (len(kg) * len(kwh)), high))
+    return pd.DataFrame(records, columns=["material", "energy_source", "min", "mean", "max"])
+
+
+def sweep_frame(grid, materials, energies, kg_values, kwh_values, category):
+    # Long format for download: one row per grid point
+    m, e, k, h = grid.shape
+    if grid.size > MAX_TABLE_ROWS:
+        raise ValueError(f"Sweep has {grid.size:,} points; narrow the grid to at most {MAX_TABLE_ROWS:,} for download")
+    return pd.DataFrame({
+        "material": np.repeat(np.asarray(materials, dtype=object), e * k * h),
+        "energy_source": np.tile(np.repeat(np.asarray(energies, dtype=object), k * h), m),
+        "amount_kg": np.tile(np.repeat(np.asarray(kg_values, dtype=np.float64), h), m * e),
+        "energy_kwh": np.tile(np.asarray(kwh_values, dtype=np.float64), m * e * k),
+        category: grid.ravel(),
+    })
+
+
+def comparison_frame(registry, materials, energies, kg_values, kwh, category):
+    # Impact vs material amount at one energy level, one column per pair;
+    # computed directly, without the full grid
+    mat, eng = _pair_factors(registry, materials, energies, category)
+    kg = np.asarray(kg_values, dtype=np.float64)
+    columns = [f"{m} / {e}" for m in materials for e in energies]
+    values = (mat[:, None, None] * kg[None, None, :] + eng[None, :, None] * kwh).reshape(len(columns), -1).T
+    return pd.DataFrame(values, index=pd.Index(kg_values, name="amount_kg"), columns=columns)
+
+
+# --- One-at-a-Time Sensitivity ---
+def _factor_bounds(values, codes, spreads, swing):
+    # P5/P95 of each factor's distribution; +/- swing where none is given
+    low = values * (1 - swing)
+    high = values * (1 + swing)
+    lognormal = codes == DISTRIBUTIONS["lognormal"]
+    normal = codes == DISTRIBUTIONS["normal"]
+    uniform = codes == DISTRIBUTIONS["uniform"]
+    gsd = np.where(lognormal, np.maximum(spreads, 1.0), 1.0)
+    low = np.where(lognormal, values * gsd ** -Z_90, low)
+    high = np.where(lognormal, values * gsd ** Z_90, high)
+    low = np.where(normal, values * (1 - Z_90 * spreads), low)
+    high = np.where(normal, values * (1 + Z_90 * spreads), high)
+    low = np.where(uniform, values * (1 - 0.9 * spreads), low)
+    high = np.where(uniform, values * (1 + 0.9 * spreads), high)
+    return low, high
+
+
+def tornado(registry, material, mat_amount, energy_type, energy_amount, swing=0.1, uncertainty=None,
+            categories=IMPACT_KEYS):
+    # Each input is moved to its low/high value while the others stay at base.
+    # Factors use their P5/P95 when an uncertainty table is given, amounts
+    # always move by +/- swing. Factors only touch their own category.
+    cols = registry.columns(categories)
+    rows = [registry.row("material", material), registry.row("energy", energy_type)]
+    factors = registry.values[rows][:, cols]
+    amounts = np.array([mat_amount, energy_amount], dtype=np.float64)
+    if uncertainty is None:
+        low, high = factors * (1 - swing), factors * (1 + swing)
+    else:
+        codes, spreads = uncertainty
+        low, high = _factor_bounds(factors, codes[rows][:, cols], spreads[rows][:, cols], swing)
+
+    # All inputs at once: base plus the change from moving each one alone
+    contrib = factors * amounts[:, None]
+    base = contrib.sum(axis=0)
+    names = [f"{material} factor", f"{energy_type} factor", "Material amount", "Energy amount"]
+    lows = np.vstack([base + (low - factors) * amounts[:, None], base - contrib * swing])
+    highs = np.vstack([base + (high - factors) * amounts[:, None], base + contrib * swing])
+
+    result = pd.DataFrame({
+        "category": np.tile(list(categories), len(names)),
+        "input": np.repeat(names, len(base)),
+        "base": np.tile(base, len(names)),
+        "low": lows.ravel(),
+        "high": highs.ravel(),
+    })
+    result["range"] = result["high"] - result["low"]
+    return result.sort_values(["category", "range"], ascending=[True, False], ignore_index=True)
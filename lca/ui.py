@@ -0,0 +1,72 @@
+import streamlit as st
+
+import metrics
+from .export import EXPORT_FORMATS, export_bytes, export_type
+from .factor_registry import default_registry
+from .report import submit_report
+
+# --- Page ---
+# Streamlit building blocks shared by the calculator apps. Nothing here
+# imports pandas or an exporter library; those load with the first result.
+def page_config(page_icon="🌱", layout="centered"):
+    st.set_page_config(page_title="LCA Calculator", page_icon=page_icon, layout=layout)
+
+
+# --- Inputs ---
+def scenario_inputs(registry=None, step=0.1):
+    # Material and energy pickers side by side -> (material, kg, energy, kWh)
+    registry = registry or default_registry()
+    col1, col2 = st.columns(2)
+    with col1:
+        material = st.selectbox("Select Material", registry.names("material"))
+        material_amount = st.number_input("Amount (kg)", min_value=0.0, value=1.0, step=step)
+    with col2:
+        energy_type = st.selectbox("Energy Source", registry.names("energy"))
+        energy_amount = st.number_input("Energy (kWh)", min_value=0.0, value=1.0, step=step)
+    return material, material_amount, energy_type, energy_amount
+
+
+# --- Results ---
+def show_results(results_df):
+    st.success("### Results")
+    st.dataframe(results_df, hide_index=True, use_container_width=True)
+
+
+# --- Exports ---
+def create_csv(results_df):
+    with metrics.span("lca.create_csv"):
+        return export_bytes(results_df[["Metric", "Value", "Score"]], "csv")
+
+
+def pdf_button(material, mat_amount, energy_type, energy_amount, results_df, label="📄 Export Report as PDF"):
+    # Rendered off-thread (fpdf loads there) and cached by inputs
+    report = submit_report(material, mat_amount, energy_type, energy_amount, results_df)
+    st.download_button(label=label, data=report.result, file_name="lca_report.pdf", mime="application/pdf")
+
+
+def csv_button(results_df, label="📊 Download CSV Data", key=None):
+    # Serialized only when the button is clicked, not on every rerun
+    st.download_button(label=label, data=lambda: create_csv(results_df), file_name="lca_results.csv",
+                       mime="text/csv", key=key)
+
+
+def download_results(df, label, basename):
+    # Format/compression pickers plus a download serialized on click; df may
+    # be a callable, so large tables are only built on click too
+    col1, col2 = st.columns(2)
+    with col1:
+        fmt = st.selectbox("Export Format", list(EXPORT_FORMATS), key=f"{basename}_format")
+    with col2:
+        options = EXPORT_FORMATS[fmt][2]
+        compression = st.selectbox(
+            "Compression", options, index=options.index(EXPORT_FORMATS[fmt][3]),
+            format_func=lambda c: c or "none", key=f"{basename}_compression"
+        )
+    extension, mime = export_type(fmt, compression)
+    st.download_button(
+        label=label,
+        data=lambda: export_bytes(df() if callable(df) else df, fmt, compression),
+        file_name=f"{basename}.{extension}",
+        mime=mime,
+        key=f"{basename}_download"
+    )
@@ -0,0 +1,177 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from .factor_registry import DATA_DIR, FACTORS_PATH, IMPACT_KEYS, default_registry
+
+# --- Defaults ---
+UNCERTAINTY_PATH = os.path.join(DATA_DIR, "factor_uncertainty.csv")
+DISTRIBUTIONS = {"fixed": 0, "lognormal": 1, "normal": 2, "uniform": 3}
+PERCENTILES = [5, 50, 95]
+HISTOGRAM_BINS = 8192
+
+
+# --- Factor Distributions ---
+# spread is the geometric standard deviation for lognormal, the relative
+# standard deviation for normal and the relative half-width for uniform.
+# Point factors are kept as the median (lognormal) or mean (others).
+def load_uncertainty(registry, path=UNCERTAINTY_PATH):
+    rules = pd.read_csv(path)
+    unknown = sorted(set(rules["distribution"]) - set(DISTRIBUTIONS))
+    if unknown:
+        raise ValueError(f"Unknown distributions: {', '.join(unknown)}")
+
+    # Most specific rule wins: (name, category) > name > category > default
+    rules = rules.assign(specificity=(rules["name"] != "*") * 2 + (rules["category"] != "*"))
+    rules = rules.sort_values("specificity", kind="stable")
+
+    # Tables mirror registry.values so factors and distributions share row indices
+    codes = np.zeros(registry.values.shape, dtype=np.int8)
+    spreads = np.zeros(registry.values.shape)
+    for rule in rules.itertuples():
+        if rule.name == "*":
+            rows = registry.rows(rule.kind)
+        else:
+            rows = [registry.row(rule.kind, rule.name)]
+        cols = slice(None) if rule.category == "*" else [registry.category_index[rule.category]]
+        codes[rows, cols] = DISTRIBUTIONS[rule.distribution]
+        spreads[rows, cols] = rule.spread
+    return codes, spreads
+
+
+@lru_cache(maxsize=None)
+def _cached_uncertainty(factors_path, path, factors_mtime, mtime):
+    return load_uncertainty(default_registry(factors_path), path)
+
+
+def default_uncertainty(factors_path=FACTORS_PATH, path=UNCERTAINTY_PATH):
+    factors_path = os.path.abspath(factors_path)
+    path = os.path.abspath(path)
+    return _cached_uncertainty(factors_path, path, os.path.getmtime(factors_path), os.path.getmtime(path))
+
+
+# --- Sampling ---
+def _sample_factors(rng, values, codes, spreads, n):
+    # values/codes/spreads: (factors, categories) -> samples (n, factors, categories)
+    shape = (n,) + values.shape
+    samples = np.broadcast_to(values, shape).copy()
+    lognormal = codes == 1
+    normal = codes == 2
+    uniform = codes == 3
+    if lognormal.any() or normal.any():
+        z = rng.standard_normal(shape)
+        if lognormal.any():
+            sigma = np.log(np.where(lognormal, np.maximum(spreads, 1.0), 1.0))
+            samples = np.where(lognormal, values * np.exp(z * sigma), samples)
+        if normal.any():
+            samples = np.where(normal, values * (1 + z * spreads), samples)
+    if uniform.any():
+        u = rng.uniform(-1.0, 1.0, shape)
+        samples = np.where(uniform, values * (1 + u * spreads), samples)
+    return samples
+
+
+def _sample_impacts(seed, n, values, codes, spreads, amounts):
+    rng = np.random.default_rng(seed)
+    factors = _sample_factors(rng, values, codes, spreads, n)
+    return np.einsum("nfc,f->nc", factors, amounts)
+
+
+def _histogram_chunk(args):
+    seed, n, values, codes, spreads, amounts, edges = args
+    impacts = _sample_impacts(seed, n, values, codes, spreads, amounts)
+    counts = np.stack([
+        np.bincount(
+            np.searchsorted(edges[c], impacts[:, c], side="right"),
+            minlength=edges.shape[1] + 1,
+        )
+        for c in range(impacts.shape[1])
+    ])
+    return counts, impacts.sum(axis=0), impacts.min(axis=0), impacts.max(axis=0)
+
+
+# --- Streaming Percentiles ---
+class StreamingPercentiles:
+    # Fixed-edge histogram per category: memory is O(bins) however many
+    # samples are added. Percentiles are interpolated inside a bin, so the
+    # error is at most one bin width (range / bins) for in-range values.
+    def __init__(self, edges):
+        self.edges = edges
+        self.counts = np.zeros((edges.shape[0], edges.shape[1] + 1), dtype=np.int64)
+        self.total = np.zeros(edges.shape[0])
+        self.minimum = np.full(edges.shape[0], np.inf)
+        self.maximum = np.full(edges.shape[0], -np.inf)
+        self.n = 0
+
+    def add(self, counts, total, minimum, maximum):
+        self.counts += counts
+        self.total += total
+        self.minimum = np.minimum(self.minimum, minimum)
+        self.maximum = np.maximum(self.maximum, maximum)
+        self.n = int(self.counts[0].sum())
+
+    def mean(self):
+        return self.total / self.n
+
+    def percentile(self, q):
+        out = np.empty(self.edges.shape[0])
+        for c in range(self.edges.shape[0]):
+            # Under/overflow bins are bounded by the observed min/max
+            bounds = np.concatenate([[self.minimum[c]], self.edges[c], [self.maximum[c]]])
+            cdf = np.cumsum(self.counts[c])
+            target = q / 100 * self.n
+            b = int(np.searchsorted(cdf, target, side="left"))
+            below = cdf[b - 1] if b > 0 else 0
+            frac = (target - below) / max(self.counts[c, b], 1)
+            lo, hi = bounds[b], bounds[b + 1]
+            out[c] = np.clip(lo + frac * (hi - lo), self.minimum[c], self.maximum[c])
+        return out
+
+
+def _histogram_edges(pilot, bins):
+    lo = pilot.min(axis=0)
+    hi = pilot.max(axis=0)
+    pad = np.maximum(hi - lo, np.abs(hi) * 1e-9 + 1e-300)
+    return np.linspace(lo - pad, hi + pad, bins - 1, axis=1)
+
+
+# --- Monte Carlo ---
+def simulate(values, codes, spreads, amounts, n_samples=100_000, chunk_size=50_000, seed=None,
+             workers=0, bins=HISTOGRAM_BINS):
+    values = np.asarray(values, dtype=np.float64)
+    amounts = np.asarray(amounts, dtype=np.float64)
+    sizes = [min(chunk_size, n_samples - start) for start in range(0, n_samples, chunk_size)]
+    # One child seed per chunk, so results do not depend on the worker count
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes) + 1)
+
+    pilot = _sample_impacts(seeds[0], min(chunk_size, 10_000), values, codes, spreads, amounts)
+    stats = StreamingPercentiles(_histogram_edges(pilot, bins))
+    tasks = [(s, n, values, codes, spreads, amounts, stats.edges) for s, n in zip(seeds[1:], sizes)]
+
+    if workers and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for result in pool.map(_histogram_chunk, tasks):
+                stats.add(*result)
+    else:
+        for task in tasks:
+            stats.add(*_histogram_chunk(task))
+    return stats
+
+
+def impact_uncertainty(registry, uncertainty, material, mat_amount, energy_type, energy_amount,
+                       categories=IMPACT_KEYS, percentiles=PERCENTILES, **kwargs):
+    cols = registry.columns(categories)
+    rows = [registry.row("material", material), registry.row("energy", energy_type)]
+    codes, spreads = uncertainty
+    values = registry.values[rows][:, cols]
+    codes = codes[rows][:, cols]
+    spreads = spreads[rows][:, cols]
+
+    stats = simulate(values, codes, spreads, [mat_amount, energy_amount], **kwargs)
+    result = pd.DataFrame({"category": list(categories), "mean": stats.mean()})
+    for q in percentiles:
+        result[f"p{q}"] = stats.percentile(q)
+    return result
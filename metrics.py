@@ -0,0 +1,232 @@
+import atexit
+import cProfile
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --- Defaults ---
+# Off unless one of these is set: METRICS_FILE (Prometheus text rewritten
+# every FLUSH_INTERVAL seconds and at exit), METRICS_PORT (GET /metrics on
+# localhost), METRICS_PROFILE_DIR (where profile() writes .prof dumps).
+FILE_ENV = "METRICS_FILE"
+PORT_ENV = "METRICS_PORT"
+PROFILE_DIR_ENV = "METRICS_PROFILE_DIR"
+FLUSH_INTERVAL = 10.0
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 1000)
+NAME = re.compile(r"[^a-zA-Z0-9_:]")
+
+enabled = False
+profile_dir = None
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_NULL = nullcontext()
+
+
+# --- Recording ---
+# Every recording call returns at its first line when metrics are off, so
+# instrumented code pays one function call and a global lookup.
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def count(name, value=1, **labels):
+    if not enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def _histogram(key, buckets):
+    # Caller holds the lock; [bucket bounds, per-bucket counts (+Inf last), sum, count]
+    hist = _histograms.get(key)
+    if hist is None:
+        hist = _histograms[key] = [buckets, [0] * (len(buckets) + 1), 0.0, 0]
+    return hist
+
+
+def observe(name, value, buckets=LATENCY_BUCKETS, **labels):
+    if not enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        hist = _histogram(key, buckets)
+        hist[1][bisect_left(hist[0], value)] += 1
+        hist[2] += value
+        hist[3] += 1
+
+
+def observe_many(name, values, buckets=COUNT_BUCKETS, **labels):
+    # Vectorized observe() for an array of values
+    if not enabled:
+        return
+    import numpy as np
+
+    values = np.asarray(values, dtype=np.float64).ravel()
+    if not values.size:
+        return
+    counts = np.bincount(np.searchsorted(buckets, values, side="left"), minlength=len(buckets) + 1)
+    key = _key(name, labels)
+    with _lock:
+        hist = _histogram(key, buckets)
+        hist[1] = [a + int(b) for a, b in zip(hist[1], counts)]
+        hist[2] += float(values.sum())
+        hist[3] += int(values.size)
+
+
+class _Span:
+    __slots__ = ("name", "labels", "start")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe("stage_seconds", time.perf_counter() - self.start, stage=self.name,
+                status="error" if exc_type else "ok", **self.labels)
+
+
+def span(name, **labels):
+    # with span("che27.search"): ... -> stage_seconds{stage="che27.search"}
+    return _Span(name, labels) if enabled else _NULL
+
+
+# --- Profiling ---
+class _Profile:
+    def __init__(self, name):
+        self.name = name
+        self.profiler = cProfile.Profile()
+
+    def __enter__(self):
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profiler.disable()
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(profile_dir, f"{NAME.sub('_', self.name)}-{stamp}-{threading.get_ident()}.prof")
+        self.profiler.dump_stats(path)
+        count("profiles_written_total", stage=self.name)
+
+
+def profile(name, requested=True):
+    # cProfile dump of one request when it asks for it (requested) and a
+    # profile directory is configured; view with python -m pstats or snakeviz
+    return _Profile(name) if requested and profile_dir else _NULL
+
+
+# --- Export ---
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels, extra=()):
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def render():
+    # Prometheus text exposition format
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted((key, [hist[0], list(hist[1]), hist[2], hist[3]]) for key, hist in _histograms.items())
+    lines = []
+    typed = set()
+    for (name, labels), value in counters:
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {name} counter")
+        lines.append(f"{name}{_labels(labels)} {value:.12g}")
+    for (name, labels), (buckets, counts, total, n) in histograms:
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {name} histogram")
+        cumulative = 0
+        for bound, bucket in zip([*buckets, "+Inf"], counts):
+            cumulative += bucket
+            lines.append(f"{name}_bucket{_labels(labels, [('le', f'{bound:g}' if bound != '+Inf' else bound)])} "
+                         f"{cumulative}")
+        lines.append(f"{name}_sum{_labels(labels)} {total:.9g}")
+        lines.append(f"{name}_count{_labels(labels)} {n}")
+    return "\n".join(lines) + "\n"
+
+
+def write(path):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(render())
+    os.replace(tmp, path)
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        data = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# --- Configuration ---
+def configure(path=None, port=None, profile_to=None, interval=FLUSH_INTERVAL):
+    # Turns recording on. Returns the /metrics server when port is given
+    # (0 picks a free one).
+    global enabled, profile_dir
+    server = None
+    if port is not None:
+        server = ThreadingHTTPServer(("127.0.0.1", port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    if profile_to:
+        os.makedirs(profile_to, exist_ok=True)
+        profile_dir = profile_to
+    enabled = True
+    if path:
+        def flush():
+            while True:
+                time.sleep(interval)
+                write(path)
+
+        threading.Thread(target=flush, name="metrics-flush", daemon=True).start()
+        atexit.register(write, path)
+    return server
+
+
+def _configure_from_env():
+    path = os.environ.get(FILE_ENV)
+    port = os.environ.get(PORT_ENV)
+    profile_to = os.environ.get(PROFILE_DIR_ENV)
+    if path or port or profile_to:
+        try:
+            configure(path, int(port) if port else None, profile_to)
+        except OSError:
+            # Another process already serves the port (e.g. a second
+            # Streamlit app); keep recording to the file only
+            configure(path, None, profile_to)
+
+
+_configure_from_env()
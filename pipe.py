@@ -1,39 +1,13 @@
 import streamlit as st
+import pandas as pd
 import math
-
-# Constants
-PIPE_TYPES = {
-    "steel": 0.00015,
-    "cast iron": 0.00026,
-    "concrete": 0.003,
-    "PVC": 0.0000015,
-    "copper tubing": 0.0000015
-}
-rho = 1000
-mu = 1e-3
-g = 9.81
-
-def colebrook_white(Re, epsilon, D):
-    if Re < 2000:
-        return 64 / Re
-    f = 0.02
-    for _ in range(50):
-        f_old = f
-        f = 1 / (-2 * math.log10((epsilon / (3.7 * D)) + (2.51 / (Re * math.sqrt(f))))) ** 2
-        if abs(f - f_old) < 1e-6:
-            break
-    return f
-
-def solve_velocity_from_head_loss(L, D, h_f, epsilon):
-    f = 0.02
-    for _ in range(100):
-        V = math.sqrt((2 * g * h_f * D) / (f * L))
-        Re = (rho * V * D) / mu
-        f_new = colebrook_white(Re, epsilon, D)
-        if abs(f_new - f) < 1e-6:
-            break
-        f = f_new
-    return V, f, Re
+import metrics
+from pipe_solver import PIPE_TYPES, g, colebrook_white, solve_pipes, solve_velocity_from_head_loss
+from fluids import DEFAULT_FLUID, DEFAULT_T, default_fluids
+from lca.export import export_bytes
+from friction_table import MAX_REL_ERROR, default_table
+from pipe_network import NODE_COLUMNS, PIPE_COLUMNS, solve_network
+from pipe_sizing import ENERGY_PRICE, LINE_COLUMNS, rank_sizes, size_pipes
 
 # Streamlit UI
 st.title("Pipe Major Loss Calculator")
@@ -41,34 +15,49 @@ st.title("Pipe Major Loss Calculator")
 pipe_type = st.selectbox("Select Pipe Type", list(PIPE_TYPES.keys()))
 epsilon = PIPE_TYPES[pipe_type]
 
+# Fluid properties from the temperature tables; also the default for batch,
+# network and sizing files without fluid/T columns
+fluids = default_fluids()
+fluid = st.selectbox("Fluid", fluids.names, index=fluids.names.index(DEFAULT_FLUID))
+T_min, T_max = fluids.range(fluid)
+T = st.number_input("Temperature (°C)", min_value=T_min, max_value=T_max, value=min(max(DEFAULT_T, T_min), T_max))
+rho, mu = fluids.at(fluid, T)
+st.caption(f"Density {rho:.1f} kg/m³, viscosity {mu * 1e3:.4f} mPa·s")
+
 st.subheader("Enter Known Values (leave unknowns blank):")
 L = st.number_input("Pipe Length (m)", min_value=0.0, format="%.2f")
 D = st.number_input("Pipe Diameter (m)", min_value=0.0, format="%.3f")
 Q = st.text_input("Flow Rate (m³/s)")
 V = st.text_input("Velocity (m/s)")
 h_f = st.text_input("Major Head Loss (m)")
+fast = st.checkbox(f"Fast friction lookup (precomputed table, max relative error {MAX_REL_ERROR:.1e})")
+friction = default_table().factor if fast else colebrook_white
 
 # Convert input strings to float where possible
 Q = float(Q) if Q else None
 V = float(V) if V else None
 h_f = float(h_f) if h_f else None
 
+# ?profile=1 in the page URL writes a cProfile dump per calculation
+profiling = st.query_params.get("profile") == "1"
+
 if st.button("Calculate"):
     try:
-        A = math.pi * D**2 / 4 if D else None
+        with metrics.profile("pipe.calculate", profiling), metrics.span("pipe.calculate"):
+            A = math.pi * D**2 / 4 if D else None
 
-        if V is None and h_f and L and D:
-            V, f, Re = solve_velocity_from_head_loss(L, D, h_f, epsilon)
-        else:
-            if V is None and Q and A:
-                V = Q / A
-            if Q is None and V and A:
-                Q = V * A
-            if V and D:
-                Re = (rho * V * D) / mu
-                f = colebrook_white(Re, epsilon, D)
-            if h_f is None and V and L and D:
-                h_f = f * (L / D) * V**2 / (2 * g)
+            if V is None and h_f and L and D:
+                V, f, Re = solve_velocity_from_head_loss(L, D, h_f, epsilon, friction, rho, mu)
+            else:
+                if V is None and Q and A:
+                    V = Q / A
+                if Q is None and V and A:
+                    Q = V * A
+                if V and D:
+                    Re = (rho * V * D) / mu
+                    f = friction(Re, epsilon, D)
+                if h_f is None and V and L and D:
+                    h_f = f * (L / D) * V**2 / (2 * g)
 
         st.success("Calculation Complete")
         st.write(f"**Velocity (m/s):** {V:.4f}" if V else "")
@@ -79,3 +68,84 @@ if st.button("Calculate"):
 
     except Exception as e:
         st.error(f"Error: {e}")
+
+# Batch Mode
+st.markdown("---")
+st.subheader("Batch Mode")
+st.caption("CSV columns: pipe_type (or epsilon), L, D and any of Q, V, h_f; optional fluid and T (°C) per pipe")
+uploaded = st.file_uploader("Pipe List", type=["csv"])
+if uploaded is not None:
+    try:
+        with metrics.profile("pipe.batch", profiling), metrics.span("pipe.batch"):
+            results = solve_pipes(pd.read_csv(uploaded), friction=default_table().factors if fast else None,
+                                  fluid=fluid, T=T)
+        st.success(f"Solved {len(results)} pipes")
+        st.dataframe(results.head(1000), hide_index=True, use_container_width=True)
+        st.download_button(
+            label="Download Results (CSV)",
+            data=lambda: export_bytes(results, "csv"),
+            file_name="pipe_results.csv",
+            mime="text/csv"
+        )
+    except Exception as e:
+        st.error(f"Error: {e}")
+
+# Network Mode
+st.markdown("---")
+st.subheader("Network Mode")
+st.caption(f"Nodes CSV: {', '.join(NODE_COLUMNS)} (head only for reservoirs/tanks). "
+           f"Pipes CSV: {', '.join(PIPE_COLUMNS)}, optional fluid and T (°C)")
+nodes_file = st.file_uploader("Nodes", type=["csv"])
+pipes_file = st.file_uploader("Pipes", type=["csv"])
+if nodes_file is not None and pipes_file is not None:
+    try:
+        with metrics.profile("pipe.network", profiling), metrics.span("pipe.network"):
+            node_results, pipe_results, iterations = solve_network(
+                pd.read_csv(nodes_file), pd.read_csv(pipes_file), friction=default_table().factors if fast else None,
+                fluid=fluid, T=T
+            )
+        st.success(f"Solved {len(pipe_results)} pipes in {iterations} iterations")
+        st.dataframe(node_results.head(1000), hide_index=True, use_container_width=True)
+        st.dataframe(pipe_results.head(1000), hide_index=True, use_container_width=True)
+        st.download_button(
+            label="Download Node Results (CSV)",
+            data=lambda: export_bytes(node_results, "csv"),
+            file_name="network_nodes.csv",
+            mime="text/csv"
+        )
+        st.download_button(
+            label="Download Pipe Results (CSV)",
+            data=lambda: export_bytes(pipe_results, "csv"),
+            file_name="network_pipes.csv",
+            mime="text/csv"
+        )
+    except Exception as e:
+        st.error(f"Error: {e}")
+
+# Sizing Mode
+st.markdown("---")
+st.subheader("Sizing Mode")
+st.caption(f"Lines CSV: {', '.join(LINE_COLUMNS)}, optional max_h_f, max_V, fluid and T (°C) per line")
+lines_file = st.file_uploader("Lines", type=["csv"])
+size_h_f = st.number_input("Default Max Head Loss (m, 0 = none)", min_value=0.0, value=0.0)
+size_V = st.number_input("Default Max Velocity (m/s, 0 = none)", min_value=0.0, value=3.0)
+rank = st.checkbox("Rank catalog sizes by pipe + pumping cost")
+if rank:
+    energy_price = st.number_input("Energy Price (per kWh)", min_value=0.0, value=ENERGY_PRICE)
+if lines_file is not None:
+    try:
+        lines = pd.read_csv(lines_file)
+        limits = dict(max_h_f=size_h_f or None, max_V=size_V or None,
+                      friction=default_table().factors if fast else None, fluid=fluid, T=T)
+        with metrics.profile("pipe.sizing", profiling), metrics.span("pipe.sizing"):
+            sized = rank_sizes(lines, energy_price=energy_price, **limits) if rank else size_pipes(lines, **limits)
+        st.success(f"Sized {len(lines)} lines")
+        st.dataframe(sized.head(1000), hide_index=True, use_container_width=True)
+        st.download_button(
+            label="Download Sizing (CSV)",
+            data=lambda: export_bytes(sized, "csv"),
+            file_name="pipe_sizing.csv",
+            mime="text/csv"
+        )
+    except Exception as e:
+        st.error(f"Error: {e}")
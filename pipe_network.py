@@ -0,0 +1,195 @@
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.sparse.linalg import splu
+
+import metrics
+from fluids import DEFAULT_FLUID, DEFAULT_T
+from pipe_solver import LAMINAR_RE, LN10, PIPE_TYPES, colebrook_array, fluid_arrays, g, mu, rho
+
+# --- Defaults ---
+NODE_COLUMNS = ["node", "elevation", "demand", "head"]
+PIPE_COLUMNS = ["pipe", "from", "to", "L", "D", "pipe_type"]
+TOLERANCE = 1e-8
+MAX_ITER = 100
+INITIAL_VELOCITY = 1.0
+TRANSITION_RE = 4000
+
+
+# --- Input ---
+def read_network(nodes_path, pipes_path):
+    # nodes: node, elevation, demand (m³/s drawn off), head (fixed head for
+    # reservoirs/tanks, blank for junctions). pipes: pipe, from, to, L, D,
+    # pipe_type or epsilon, and optionally fluid and T (°C).
+    return pd.read_csv(nodes_path), pd.read_csv(pipes_path)
+
+
+def _network_arrays(nodes, pipes):
+    if "node" not in nodes.columns:
+        raise ValueError("Missing node column: node")
+    for col in ("pipe", "from", "to", "L", "D"):
+        if col not in pipes.columns:
+            raise ValueError(f"Missing pipe column: {col}")
+    names = nodes["node"].astype(str)
+    if names.duplicated().any():
+        raise ValueError(f"Duplicate nodes: {', '.join(names[names.duplicated()].unique())}")
+    index = pd.Index(names)
+    start = index.get_indexer(pipes["from"].astype(str))
+    end = index.get_indexer(pipes["to"].astype(str))
+    unknown = set(pipes["from"].astype(str)[start < 0]) | set(pipes["to"].astype(str)[end < 0])
+    if unknown:
+        raise ValueError(f"Unknown nodes: {', '.join(sorted(unknown))}")
+
+    if "epsilon" in pipes.columns:
+        epsilon = pipes["epsilon"].to_numpy(dtype=np.float64)
+    elif "pipe_type" in pipes.columns:
+        unknown = sorted(set(pipes["pipe_type"]) - set(PIPE_TYPES))
+        if unknown:
+            raise ValueError(f"Unknown pipe types: {', '.join(map(str, unknown))}")
+        epsilon = pipes["pipe_type"].map(PIPE_TYPES).to_numpy(dtype=np.float64)
+    else:
+        raise ValueError("Missing pipe column: pipe_type or epsilon")
+
+    def column(df, name, default):
+        if name not in df.columns:
+            return np.full(len(df), default)
+        return pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=np.float64)
+
+    head = column(nodes, "head", np.nan)
+    if not np.isfinite(head).any():
+        raise ValueError("Network needs at least one fixed-head node (reservoir or tank)")
+    return {
+        "start": start, "end": end, "epsilon": epsilon,
+        "L": column(pipes, "L", np.nan), "D": column(pipes, "D", np.nan),
+        "elevation": np.nan_to_num(column(nodes, "elevation", 0.0)),
+        "demand": np.nan_to_num(column(nodes, "demand", 0.0)),
+        "head": head,
+    }
+
+
+# --- Head Loss ---
+def _head_loss(Q, L, D, epsilon, nu, friction):
+    # Darcy-Weisbach h = 8 f L Q|Q| / (g pi^2 D^5) and its slope dh/dQ, with
+    # df/dRe from implicit differentiation of Colebrook. Below Re = 2000 the
+    # laminar slope is used, which also keeps it positive at Q = 0. Between
+    # 2000 and 4000 f is interpolated linearly in Re so h(Q) has no jump for
+    # Newton to cycle on.
+    A = np.pi * D ** 2 / 4
+    Re = np.abs(Q) / A * D / nu
+    laminar_slope = 128 * nu * L / (g * np.pi * D ** 4)
+    laminar = Re < LAMINAR_RE
+    transition = ~laminar & (Re < TRANSITION_RE)
+    f = np.empty_like(Q)
+    f[laminar] = 64 / np.maximum(Re[laminar], 1e-300)
+    f[~laminar] = friction(np.maximum(Re[~laminar], TRANSITION_RE), epsilon[~laminar], D[~laminar])
+    # f_turb is taken at Re = 4000 throughout the band, so the interpolated f
+    # has slope (f_turb - 64/2000) / 2000 there; no division by the weight,
+    # which is 0 at exactly Re = 2000
+    rise = f[transition] - 64 / LAMINAR_RE
+    weight = (Re[transition] - LAMINAR_RE) / (TRANSITION_RE - LAMINAR_RE)
+    f[transition] = 64 / LAMINAR_RE + weight * rise
+    # Re df/dRe for 1/sqrt(f) = -2 log10(e/3.7D + 2.51 / (Re sqrt(f)))
+    x = 1 / np.sqrt(f)
+    b = 2.51 * x / np.maximum(Re, 1e-300)
+    k = (2 / LN10) / (epsilon / (3.7 * D) + b)
+    re_dfdre = np.where(laminar, -f, -2 * f / x * (k * b) / (1 + k * b / x))
+    re_dfdre[transition] = Re[transition] * rise / (TRANSITION_RE - LAMINAR_RE)
+    r = 8 * f * L / (g * np.pi ** 2 * D ** 5)
+    h = np.where(laminar, laminar_slope * Q, r * Q * np.abs(Q))
+    slope = np.abs(Q) * (2 * r + 8 * L / (g * np.pi ** 2 * D ** 5) * re_dfdre)
+    slope = np.where(laminar, laminar_slope, np.maximum(slope, laminar_slope))
+    return h, slope, Re, f
+
+
+# --- Solver ---
+def solve_network(nodes, pipes, rho=rho, mu=mu, friction=None, tol=TOLERANCE, max_iter=MAX_ITER, fluid=None, T=None):
+    # Global gradient algorithm (Todini-Pilati): Newton on all pipe flows and
+    # junction heads at once. Each step solves one sparse symmetric system
+    # A^T G^-1 A over junction heads, so cost grows with the number of pipes
+    # rather than with the number of loops. Fluid properties are per pipe
+    # (see fluid_arrays), so segments can run at different temperatures.
+    friction = friction or colebrook_array
+    net = _network_arrays(nodes, pipes)
+    L, D, epsilon = net["L"], net["D"], net["epsilon"]
+    rho, mu = fluid_arrays(pipes, rho, mu, fluid, T)
+    nu = mu / rho
+    n_pipes, n_nodes = len(L), len(net["head"])
+
+    fixed = np.isfinite(net["head"])
+    n_junctions = int((~fixed).sum())
+
+    # Incidence: +1 at the upstream node, -1 downstream; H_from - H_to = A H
+    rows = np.concatenate([np.arange(n_pipes), np.arange(n_pipes)])
+    cols = np.concatenate([net["start"], net["end"]])
+    signs = np.concatenate([np.ones(n_pipes), -np.ones(n_pipes)])
+    incidence = sp.csr_matrix((signs, (rows, cols)), shape=(n_pipes, n_nodes))
+    A_j = incidence[:, np.flatnonzero(~fixed)].tocsc()
+    fixed_drop = incidence[:, np.flatnonzero(fixed)] @ net["head"][fixed]
+    demand = net["demand"][~fixed]
+
+    Q = INITIAL_VELOCITY * np.pi * D ** 2 / 4
+    H = np.zeros(n_junctions)
+    for iteration in range(1, max_iter + 1):
+        h, slope, _, _ = _head_loss(Q, L, D, epsilon, nu, friction)
+        inverse = 1 / slope
+        # Mass balance at junctions: A_j^T Q = -demand after the update
+        M = (A_j.T @ sp.diags(inverse) @ A_j).tocsc()
+        rhs = -demand - A_j.T @ Q + A_j.T @ (inverse * (h - fixed_drop))
+        if n_junctions:
+            try:
+                H = splu(M, permc_spec="MMD_AT_PLUS_A").solve(rhs)
+            except RuntimeError:
+                raise ValueError("Network has junctions with no path to a fixed-head node") from None
+        Q_new = Q + inverse * (A_j @ H + fixed_drop - h)
+        change = np.abs(Q_new - Q).sum() / max(np.abs(Q_new).sum(), 1e-300)
+        Q = Q_new
+        if change < tol:
+            break
+    else:
+        metrics.count("network_nonconverged_total")
+        raise ValueError(f"Network did not converge in {max_iter} iterations")
+    metrics.observe("network_iterations", iteration, metrics.COUNT_BUCKETS)
+
+    h, _, Re, f = _head_loss(Q, L, D, epsilon, nu, friction)
+    heads = net["head"].copy()
+    heads[~fixed] = H
+    node_results = nodes.copy()
+    node_results["head"] = heads
+    node_results["pressure_head"] = heads - net["elevation"]
+    pipe_results = pipes.copy()
+    pipe_results["Q"] = Q
+    pipe_results["V"] = Q / (np.pi * D ** 2 / 4)
+    pipe_results["h_f"] = h
+    pipe_results["Re"] = Re
+    pipe_results["f"] = f
+    return node_results, pipe_results, iteration
+
+
+# --- CLI ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve a looped pipe network")
+    parser.add_argument("nodes", help="node CSV: node, elevation, demand, head")
+    parser.add_argument("pipes", help="pipe CSV: pipe, from, to, L, D, pipe_type")
+    parser.add_argument("-o", "--output", default="network", help="output prefix (writes _nodes.csv and _pipes.csv)")
+    parser.add_argument("--fluid", default=DEFAULT_FLUID,
+                        help=f"fluid for pipes without a fluid column (default: {DEFAULT_FLUID})")
+    parser.add_argument("--T", type=float, default=DEFAULT_T,
+                        help=f"temperature in °C for pipes without a T column (default: {DEFAULT_T:g})")
+    args = parser.parse_args(argv)
+    try:
+        node_results, pipe_results, iterations = solve_network(*read_network(args.nodes, args.pipes),
+                                                               fluid=args.fluid, T=args.T)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    node_results.to_csv(f"{args.output}_nodes.csv", index=False)
+    pipe_results.to_csv(f"{args.output}_pipes.csv", index=False)
+    print(f"Solved {len(pipe_results)} pipes in {iterations} iterations")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from pipe_solver import PIPE_TYPES, colebrook_array, fluid_arrays, g, mu, rho
+
+# --- Defaults ---
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "pipe_catalog.csv")
+LINE_COLUMNS = ["line", "pipe_type", "Q", "L"]
+ENERGY_PRICE = 0.12  # per kWh
+OPERATING_HOURS = 8760
+PUMP_EFFICIENCY = 0.7
+YEARS = 10
+
+
+# --- Catalog ---
+class PipeCatalog:
+    # Diameters sorted per material and stored back to back; each material
+    # owns the contiguous block start[m]:end[m].
+    def __init__(self, pipe_types, D, cost_per_m=None):
+        order = np.lexsort((D, pipe_types))
+        self.pipe_types = np.asarray(pipe_types)[order]
+        self.D = np.asarray(D, dtype=np.float64)[order]
+        self.cost_per_m = None if cost_per_m is None else np.asarray(cost_per_m, dtype=np.float64)[order]
+        self.materials = list(dict.fromkeys(self.pipe_types))
+        codes = pd.Index(self.materials).get_indexer(self.pipe_types)
+        self.start = np.searchsorted(codes, np.arange(len(self.materials)), side="left")
+        self.end = np.searchsorted(codes, np.arange(len(self.materials)), side="right")
+
+    def sizes(self, pipe_type):
+        m = self.materials.index(pipe_type)
+        return self.D[self.start[m]:self.end[m]]
+
+
+def load_catalog(path=CATALOG_PATH):
+    df = pd.read_csv(path)
+    for col in ("pipe_type", "D"):
+        if col not in df.columns:
+            raise ValueError(f"{path}: catalog needs a {col} column")
+    unknown = sorted(set(df["pipe_type"]) - set(PIPE_TYPES))
+    if unknown:
+        raise ValueError(f"{path}: unknown pipe types: {', '.join(map(str, unknown))}")
+    cost = df["cost_per_m"].to_numpy() if "cost_per_m" in df.columns else None
+    return PipeCatalog(df["pipe_type"].astype(str).to_numpy(), df["D"].to_numpy(), cost)
+
+
+@lru_cache(maxsize=None)
+def _cached_catalog(path, mtime):
+    return load_catalog(path)
+
+
+def default_catalog(path=CATALOG_PATH):
+    path = os.path.abspath(path)
+    return _cached_catalog(path, os.path.getmtime(path))
+
+
+# --- Hydraulics ---
+def _hydraulics(Q, L, D, epsilon, rho, mu, friction):
+    V = Q / (np.pi * D ** 2 / 4)
+    Re = rho * np.abs(V) * D / mu
+    f = friction(Re, epsilon, D)
+    return V, f * (L / D) * V ** 2 / (2 * g), Re, f
+
+
+def _line_arrays(lines, catalog, max_h_f, max_V, rho, mu, fluid, T):
+    for col in ("pipe_type", "Q", "L"):
+        if col not in lines.columns:
+            raise ValueError(f"Missing column: {col}")
+    missing = sorted(set(lines["pipe_type"]) - set(catalog.materials))
+    if missing:
+        raise ValueError(f"No catalog sizes for: {', '.join(map(str, missing))}")
+
+    def limit(name, default):
+        values = np.full(len(lines), np.inf if default is None else float(default))
+        if name in lines.columns:
+            given = pd.to_numeric(lines[name], errors="coerce").to_numpy(dtype=np.float64)
+            values = np.where(np.isnan(given), values, given)
+        return values
+
+    h_limit = limit("max_h_f", max_h_f)
+    v_limit = limit("max_V", max_V)
+    if (np.isinf(h_limit) & np.isinf(v_limit)).any():
+        raise ValueError("Every line needs a head loss (max_h_f) or velocity (max_V) limit")
+    material = pd.Index(catalog.materials).get_indexer(lines["pipe_type"])
+    rho, mu = fluid_arrays(lines, rho, mu, fluid, T)
+    return {
+        "Q": np.abs(lines["Q"].to_numpy(dtype=np.float64)),
+        "L": lines["L"].to_numpy(dtype=np.float64),
+        "epsilon": lines["pipe_type"].map(PIPE_TYPES).to_numpy(dtype=np.float64),
+        "start": catalog.start[material], "end": catalog.end[material],
+        "max_h_f": h_limit, "max_V": v_limit,
+        "rho": rho, "mu": mu,
+    }
+
+
+# --- Sizing ---
+def size_pipes(lines, catalog=None, max_h_f=None, max_V=None, rho=rho, mu=mu, friction=None, fluid=None, T=None):
+    # Smallest catalog diameter meeting each line's head loss and velocity
+    # limits. Both fall as D grows, so every line bisects its own sorted
+    # catalog block; all lines step together, ~log2(sizes) solver passes.
+    # Per-line max_h_f / max_V (and fluid / T) columns override the defaults.
+    catalog = catalog or default_catalog()
+    friction = friction or colebrook_array
+    line = _line_arrays(lines, catalog, max_h_f, max_V, rho, mu, fluid, T)
+    lo, hi = line["start"].copy(), line["end"].copy()
+
+    while True:
+        active = lo < hi
+        if not active.any():
+            break
+        mid = (lo + hi) // 2
+        idx = np.flatnonzero(active)
+        V, h_f, _, _ = _hydraulics(line["Q"][idx], line["L"][idx], catalog.D[mid[idx]], line["epsilon"][idx],
+                                   line["rho"][idx], line["mu"][idx], friction)
+        ok = (h_f <= line["max_h_f"][idx]) & (np.abs(V) <= line["max_V"][idx])
+        hi[idx[ok]] = mid[idx[ok]]
+        lo[idx[~ok]] = mid[idx[~ok]] + 1
+
+    feasible = lo < line["end"]
+    chosen = np.minimum(lo, len(catalog.D) - 1)
+    D = np.where(feasible, catalog.D[chosen], np.nan)
+    V, h_f, Re, f = _hydraulics(line["Q"], line["L"], D, line["epsilon"], line["rho"], line["mu"], friction)
+
+    results = lines.copy()
+    results["D"] = D
+    results["V"] = V
+    results["h_f"] = h_f
+    results["Re"] = Re
+    results["f"] = f
+    results["feasible"] = feasible
+    if catalog.cost_per_m is not None:
+        results["pipe_cost"] = np.where(feasible, catalog.cost_per_m[chosen], np.nan) * line["L"]
+    return results
+
+
+def rank_sizes(lines, catalog=None, max_h_f=None, max_V=None, energy_price=ENERGY_PRICE, hours=OPERATING_HOURS,
+               efficiency=PUMP_EFFICIENCY, years=YEARS, rho=rho, mu=mu, friction=None, fluid=None, T=None):
+    # Every feasible catalog size per line, ranked by pipe cost plus the
+    # pumping energy lost to friction over the given number of years.
+    catalog = catalog or default_catalog()
+    if catalog.cost_per_m is None:
+        raise ValueError("Catalog has no cost_per_m column")
+    friction = friction or colebrook_array
+    line = _line_arrays(lines, catalog, max_h_f, max_V, rho, mu, fluid, T)
+
+    counts = line["end"] - line["start"]
+    row = np.repeat(np.arange(len(lines)), counts)
+    size = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + line["start"][row]
+    V, h_f, Re, f = _hydraulics(line["Q"][row], line["L"][row], catalog.D[size], line["epsilon"][row],
+                                line["rho"][row], line["mu"][row], friction)
+    ok = (h_f <= line["max_h_f"][row]) & (np.abs(V) <= line["max_V"][row])
+    row, size, V, h_f = row[ok], size[ok], V[ok], h_f[ok]
+
+    pipe_cost = catalog.cost_per_m[size] * line["L"][row]
+    pump_kw = line["rho"][row] * g * line["Q"][row] * h_f / (1000 * efficiency)
+    energy_cost = pump_kw * hours * years * energy_price
+    candidates = lines.iloc[row].reset_index(drop=True)
+    candidates["D"] = catalog.D[size]
+    candidates["V"] = V
+    candidates["h_f"] = h_f
+    candidates["pipe_cost"] = pipe_cost
+    candidates["energy_cost"] = energy_cost
+    candidates["total_cost"] = pipe_cost + energy_cost
+    order = np.lexsort((candidates["total_cost"].to_numpy(), row))
+    candidates = candidates.iloc[order].reset_index(drop=True)
+    candidates["rank"] = candidates.groupby(row[order]).cumcount() + 1
+    return candidates
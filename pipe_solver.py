@@ -0,0 +1,193 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+import metrics
+from fluids import DEFAULT_FLUID, DEFAULT_T, frame_properties
+
+# Constants
+PIPE_TYPES = {
+    "steel": 0.00015,
+    "cast iron": 0.00026,
+    "concrete": 0.003,
+    "PVC": 0.0000015,
+    "copper tubing": 0.0000015
+}
+# Fallback fluid (water near 20 °C) for calls without a fluid or temperature;
+# pipe.py and the pipe_network CLI default to tabulated water at 20 °C instead
+rho = 1000
+mu = 1e-3
+g = 9.81
+LAMINAR_RE = 2000
+LN10 = np.log(10.0)
+
+
+# --- Scalar Solvers ---
+# One pipe at a time, as the single-pipe calculator uses them
+def colebrook_white(Re, epsilon, D):
+    if Re < 2000:
+        return 64 / Re
+    f = 0.02
+    for i in range(50):
+        f_old = f
+        f = 1 / (-2 * math.log10((epsilon / (3.7 * D)) + (2.51 / (Re * math.sqrt(f))))) ** 2
+        if abs(f - f_old) < 1e-6:
+            break
+    else:
+        metrics.count("colebrook_nonconverged_total", solver="scalar")
+    if metrics.enabled:
+        metrics.observe("colebrook_iterations", i + 1, metrics.COUNT_BUCKETS, solver="scalar")
+    return f
+
+
+def solve_velocity_from_head_loss(L, D, h_f, epsilon, friction=colebrook_white, rho=rho, mu=mu):
+    f = 0.02
+    for i in range(100):
+        V = math.sqrt((2 * g * h_f * D) / (f * L))
+        Re = (rho * V * D) / mu
+        f_new = friction(Re, epsilon, D)
+        if abs(f_new - f) < 1e-6:
+            break
+        f = f_new
+    else:
+        metrics.count("velocity_nonconverged_total")
+    if metrics.enabled:
+        metrics.observe("velocity_iterations", i + 1, metrics.COUNT_BUCKETS)
+    return V, f, Re
+
+
+# --- Friction Factor ---
+def colebrook_array(Re, epsilon, D, tol=1e-12, max_iter=20, return_iterations=False):
+    # Newton on x = 1/sqrt(f): F(x) = x + 2 log10(e/3.7D + 2.51 x / Re) = 0,
+    # started from Swamee-Jain. All elements iterate together; converged ones
+    # are masked out. Typically 2-3 iterations to machine precision.
+    Re, epsilon, D = np.broadcast_arrays(*(np.asarray(a, dtype=np.float64) for a in (Re, epsilon, D)))
+    f = np.full(Re.shape, np.nan)
+    iterations = np.zeros(Re.shape, dtype=np.int64)
+
+    laminar = (Re > 0) & (Re < LAMINAR_RE)
+    f[laminar] = 64 / Re[laminar]
+
+    turbulent = Re >= LAMINAR_RE
+    idx = np.flatnonzero(turbulent)
+    if idx.size:
+        re = Re.ravel()[idx]
+        rel = epsilon.ravel()[idx] / (3.7 * D.ravel()[idx])
+        x = -2 * np.log10(rel + 5.74 / re ** 0.9)  # Swamee-Jain: 1/sqrt(f0)
+        active = np.arange(idx.size)
+        for i in range(max_iter):
+            arg = rel[active] + 2.51 * x[active] / re[active]
+            F = x[active] + 2 * np.log10(arg)
+            dF = 1 + (2 / LN10) * (2.51 / re[active]) / arg
+            step = F / dF
+            x[active] -= step
+            iterations.ravel()[idx[active]] = i + 1
+            active = active[np.abs(step) > tol * np.abs(x[active])]
+            if not active.size:
+                break
+        f.ravel()[idx] = 1 / x ** 2
+        metrics.observe_many("colebrook_iterations", iterations.ravel()[idx], solver="array")
+        metrics.count("colebrook_nonconverged_total", active.size, solver="array")
+
+    if return_iterations:
+        return f, iterations
+    return f
+
+
+# --- Inverse Problem ---
+def solve_velocity_array(L, D, h_f, epsilon, rho=rho, mu=mu):
+    # Given head loss, Re*sqrt(f) = (D/nu) sqrt(2 g D h_f / L) is known, so
+    # Colebrook is explicit in 1/sqrt(f); no iteration is needed. Near
+    # Re = 2000 both branches can be consistent; like the scalar solver
+    # (started at f = 0.02) the turbulent one wins when its Re >= 2000,
+    # otherwise the laminar h_f = 32 nu L V / (g D^2) solution is used. In
+    # the thin band where neither branch is consistent (the friction model
+    # jumps at 2000) the laminar value is returned.
+    L, D, h_f, epsilon, rho, mu = np.broadcast_arrays(
+        *(np.asarray(a, dtype=np.float64) for a in (L, D, h_f, epsilon, rho, mu))
+    )
+    nu = mu / rho
+    S = np.sqrt(2 * g * D * h_f / L)
+
+    V_lam = g * D ** 2 * h_f / (32 * nu * L)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        V_turb = -2 * S * np.log10(epsilon / (3.7 * D) + 2.51 * nu / (D * S))
+    laminar = ~(V_turb * D / nu >= LAMINAR_RE)
+
+    V = np.where(laminar, V_lam, V_turb)
+    Re = rho * V * D / mu
+    with np.errstate(divide="ignore", invalid="ignore"):
+        f = np.where(laminar, 64 / Re, (S / V) ** 2)
+    return V, f, Re
+
+
+# --- Fluid Properties ---
+def fluid_arrays(df, rho=rho, mu=mu, fluid=None, T=None):
+    # Per-row (rho, mu). Rows are looked up in the fluid tables when a fluid
+    # or temperature is given, as arguments or as fluid/T columns (columns
+    # win, blanks fall back to the arguments); otherwise the constants apply.
+    if fluid is None and T is None and "fluid" not in df.columns and "T" not in df.columns:
+        shape = (len(df),)
+        return (np.broadcast_to(np.asarray(rho, dtype=np.float64), shape),
+                np.broadcast_to(np.asarray(mu, dtype=np.float64), shape))
+    return frame_properties(df, DEFAULT_FLUID if fluid is None else fluid, DEFAULT_T if T is None else T)
+
+
+# --- Batch Pipes ---
+def solve_pipes(df, rho=rho, mu=mu, friction=None, fluid=None, T=None):
+    # Columns: L, D and pipe_type or epsilon, plus any of Q, V, h_f, and
+    # optionally fluid and T (°C) per pipe. Returns Q, V, h_f, Re, f for
+    # every row in one vectorized pass. friction(Re, epsilon, D) defaults to
+    # the exact Colebrook solver.
+    friction = friction or colebrook_array
+    for col in ("L", "D"):
+        if col not in df.columns:
+            raise ValueError(f"Missing column: {col}")
+    if "epsilon" in df.columns:
+        epsilon = df["epsilon"].to_numpy(dtype=np.float64)
+    elif "pipe_type" in df.columns:
+        unknown = sorted(set(df["pipe_type"]) - set(PIPE_TYPES))
+        if unknown:
+            raise ValueError(f"Unknown pipe types: {', '.join(map(str, unknown))}")
+        epsilon = df["pipe_type"].map(PIPE_TYPES).to_numpy(dtype=np.float64)
+    else:
+        raise ValueError("Missing column: pipe_type or epsilon")
+
+    def column(name):
+        if name not in df.columns:
+            return np.full(len(df), np.nan)
+        return pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=np.float64)
+
+    rho, mu = fluid_arrays(df, rho, mu, fluid, T)
+    L = column("L")
+    D = column("D")
+    Q = column("Q")
+    V = column("V")
+    h_f = column("h_f")
+    A = np.pi * D ** 2 / 4
+
+    # Forward rows: velocity known or derivable from Q
+    V = np.where(np.isnan(V), Q / A, V)
+    Re = rho * V * D / mu
+    f = friction(Re, epsilon, D)
+
+    # Inverse rows: only head loss known
+    inverse = np.isnan(V) & ~np.isnan(h_f)
+    if inverse.any():
+        V_inv, f_inv, Re_inv = solve_velocity_array(L[inverse], D[inverse], h_f[inverse], epsilon[inverse],
+                                                     rho[inverse], mu[inverse])
+        V[inverse] = V_inv
+        f[inverse] = f_inv
+        Re[inverse] = Re_inv
+
+    h_f = np.where(np.isnan(h_f), f * (L / D) * V ** 2 / (2 * g), h_f)
+    Q = np.where(np.isnan(Q), V * A, Q)
+
+    results = df.copy()
+    results["Q"] = Q
+    results["V"] = V
+    results["h_f"] = h_f
+    results["Re"] = Re
+    results["f"] = f
+    return results
@@ -0,0 +1,218 @@
+import hashlib
+import io
+import os
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from PIL import Image, UnidentifiedImageError
+
+import metrics
+
+# --- Defaults ---
+THUMBNAIL_DIR = os.environ.get(
+    "CHE27_THUMBNAIL_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "thumbnails")
+)
+WIDTH = 200
+QUALITY = 85
+MAX_MEMORY_BYTES = 16 * 2**20
+MAX_DISK_BYTES = 256 * 2**20
+WORKERS = 8
+TIMEOUT = 10.0
+FAILURE_TTL = 60.0  # seconds a failed download is not retried
+
+
+def fetch_url(url, timeout=TIMEOUT):
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return response.read()
+
+
+def downscale(data, width=WIDTH, quality=QUALITY):
+    # JPEG bytes at most `width` pixels wide (aspect kept; never upscaled),
+    # or None when the data is not an image
+    try:
+        image = Image.open(io.BytesIO(data))
+        # Lets the JPEG decoder skip straight to a reduced scale
+        image.draft("RGB", (width, width * image.height // max(image.width, 1)))
+        image = image.convert("RGB")
+    except (UnidentifiedImageError, OSError):
+        return None
+    if image.width > width:
+        image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+    out = io.BytesIO()
+    image.save(out, "JPEG", quality=quality, optimize=True)
+    return out.getvalue()
+
+
+# --- Cache ---
+class ThumbnailCache:
+    # Downscaled thumbnails kept in a byte-bounded in-memory LRU in front of
+    # a byte-bounded LRU directory (file mtime is the recency). prefetch()
+    # starts background downloads; get() serves the cached bytes, waiting on
+    # an in-flight download when there is one. A failed download is not
+    # retried for failure_ttl seconds, so pages rendering it again stay fast.
+    # fetcher(url, timeout) -> bytes does the download and can be swapped for
+    # an offline stub.
+    def __init__(self, directory=THUMBNAIL_DIR, width=WIDTH, max_memory=MAX_MEMORY_BYTES,
+                 max_disk=MAX_DISK_BYTES, fetcher=fetch_url, workers=WORKERS, timeout=TIMEOUT,
+                 failure_ttl=FAILURE_TTL):
+        self.directory = directory
+        self.width = width
+        self.max_memory = max_memory
+        self.max_disk = max_disk
+        self.fetcher = fetcher
+        self.timeout = timeout
+        self.failure_ttl = failure_ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._pending = {}
+        self._failed = {}
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="thumbnail")
+        os.makedirs(directory, exist_ok=True)
+        entries = []
+        for entry in os.scandir(directory):
+            if entry.name.endswith(".jpg"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+        self._disk = OrderedDict((key, size) for _, key, size in sorted(entries))
+        self._disk_bytes = sum(self._disk.values())
+
+    def _key(self, url):
+        return f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}_{self.width}"
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".jpg")
+
+    def _remember(self, key, data):
+        # Caller holds the lock
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.max_memory and len(self._memory) > 1:
+            self._memory_bytes -= len(self._memory.popitem(last=False)[1])
+
+    def _cached(self, key):
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                return data
+            if key not in self._disk:
+                return None
+            self._disk.move_to_end(key)
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+            os.utime(self._path(key))
+        except FileNotFoundError:
+            # Evicted by another process sharing the directory
+            with self._lock:
+                self._disk_bytes -= self._disk.pop(key, 0)
+            return None
+        with self._lock:
+            self._remember(key, data)
+        return data
+
+    def _store(self, key, data):
+        path = self._path(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        evicted = []
+        with self._lock:
+            self._remember(key, data)
+            self._disk_bytes += len(data) - self._disk.pop(key, 0)
+            self._disk[key] = len(data)
+            if self._disk_bytes > self.max_disk:
+                # Trim to 90% so eviction runs once per batch of downloads
+                while self._disk_bytes > 0.9 * self.max_disk and len(self._disk) > 1:
+                    old, size = self._disk.popitem(last=False)
+                    self._disk_bytes -= size
+                    evicted.append(old)
+        for old in evicted:
+            try:
+                os.remove(self._path(old))
+            except FileNotFoundError:
+                pass
+
+    def _failing(self, key):
+        # Caller holds the lock
+        retry_at = self._failed.get(key)
+        if retry_at is not None and retry_at <= time.monotonic():
+            del self._failed[key]
+            return False
+        return retry_at is not None
+
+    def _download(self, url, key):
+        data = None
+        try:
+            with metrics.span("thumbnail.download"):
+                data = downscale(self.fetcher(url, self.timeout), self.width)
+            if data is not None:
+                self._store(key, data)
+            return data
+        except Exception:
+            return None
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+                if data is None:
+                    now = time.monotonic()
+                    if len(self._failed) > 1000:
+                        self._failed = {k: t for k, t in self._failed.items() if t > now}
+                    self._failed[key] = now + self.failure_ttl
+
+    def prefetch(self, url):
+        # Non-blocking; a no-op when the thumbnail is cached, already queued
+        # or recently failed
+        if not url:
+            return
+        key = self._key(url)
+        with self._lock:
+            if key in self._memory or key in self._disk or key in self._pending or self._failing(key):
+                return
+            self._pending[key] = self._pool.submit(self._download, url, key)
+
+    def get(self, url, wait=True):
+        # Downscaled JPEG bytes, or None when the thumbnail cannot be fetched.
+        # With wait=False a miss only queues the download and returns None.
+        if not url:
+            return None
+        key = self._key(url)
+        data = self._cached(key)
+        if data is not None:
+            self.hits += 1
+            metrics.count("thumbnail_requests_total", result="hit")
+            return data
+        with self._lock:
+            failing = self._failing(key)
+        if failing:
+            metrics.count("thumbnail_requests_total", result="failed")
+            return None
+        self.misses += 1
+        metrics.count("thumbnail_requests_total", result="miss")
+        if not wait:
+            self.prefetch(url)
+            return None
+        with self._lock:
+            future = self._pending.get(key)
+        if future is None:
+            return self._download(url, key)
+        try:
+            return future.result(self.timeout)
+        except Exception:
+            return None
+
+
+@lru_cache(maxsize=None)
+def default_thumbnails(directory=THUMBNAIL_DIR):
+    return ThumbnailCache(directory)
@@ -0,0 +1,193 @@
+import itertools
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from functools import lru_cache
+
+import metrics
+
+# --- Defaults ---
+CACHE_PATH = os.environ.get(
+    "CHE27_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "video_cache.sqlite")
+)
+METADATA_TTL = 7 * 24 * 3600
+SEARCH_TTL = 24 * 3600
+MAX_VIDEOS = 50_000
+MAX_SEARCHES = 5_000
+VIDEO_ID = re.compile(r"(?:v=|youtu\.be/|/shorts/|/embed/)([A-Za-z0-9_-]{6,})")
+
+
+def video_id(url):
+    match = VIDEO_ID.search(url)
+    return match.group(1) if match else url
+
+
+def normalize_query(query):
+    return " ".join(unicodedata.normalize("NFKC", query).casefold().split())
+
+
+# --- Cache ---
+class VideoCache:
+    # One SQLite file shared by every session and process on the machine.
+    # Rows past their TTL are treated as misses; when a table grows past its
+    # bound the least recently used rows are dropped. Every video write takes
+    # the next value of a stored counter as its seq, in the same transaction,
+    # so seq order is commit order and values are never reused.
+    def __init__(self, path=CACHE_PATH, metadata_ttl=METADATA_TTL, search_ttl=SEARCH_TTL,
+                 max_videos=MAX_VIDEOS, max_searches=MAX_SEARCHES):
+        self.path = path
+        self.metadata_ttl = metadata_ttl
+        self.search_ttl = search_ttl
+        self.limits = {"videos": max_videos, "searches": max_searches}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("BEGIN IMMEDIATE")
+        self._db.execute("CREATE TABLE IF NOT EXISTS videos "
+                         "(key TEXT PRIMARY KEY, data TEXT, fetched_at REAL, used_at REAL, seq INTEGER)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS searches "
+                         "(key TEXT PRIMARY KEY, data TEXT, fetched_at REAL, used_at REAL)")
+        if "seq" not in [row[1] for row in self._db.execute("PRAGMA table_info(videos)")]:
+            # Cache files from before seq existed
+            self._db.execute("ALTER TABLE videos ADD COLUMN seq INTEGER")
+            self._db.execute("UPDATE videos SET seq = rowid")
+        self._db.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER)")
+        self._db.execute("INSERT OR IGNORE INTO counters "
+                         "SELECT 'videos', COALESCE(MAX(seq), 0) FROM videos")
+        for table in self.limits:
+            self._db.execute(f"CREATE INDEX IF NOT EXISTS {table}_used ON {table} (used_at)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS videos_fetched ON videos (fetched_at)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS videos_seq ON videos (seq)")
+        self._db.execute("COMMIT")
+
+    def _get(self, table, key, ttl):
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(f"SELECT data, fetched_at FROM {table} WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > ttl:
+                self.misses += 1
+                metrics.count("video_cache_requests_total", table=table, result="miss")
+                return None
+            self._db.execute(f"UPDATE {table} SET used_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        metrics.count("video_cache_requests_total", table=table, result="hit")
+        return json.loads(row[0])
+
+    def _put(self, table, key, value):
+        data = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            now = time.time()
+            if table == "videos":
+                self._db.execute("BEGIN IMMEDIATE")
+                try:
+                    self._db.execute("UPDATE counters SET value = value + 1 WHERE name = 'videos'")
+                    self._db.execute("INSERT OR REPLACE INTO videos VALUES "
+                                     "(?, ?, ?, ?, (SELECT value FROM counters WHERE name = 'videos'))",
+                                     (key, data, now, now))
+                    self._db.execute("COMMIT")
+                except BaseException:
+                    self._db.execute("ROLLBACK")
+                    raise
+            else:
+                self._db.execute(f"INSERT OR REPLACE INTO {table} VALUES (?, ?, ?, ?)", (key, data, now, now))
+            count = self._db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            limit = self.limits[table]
+            if count > limit:
+                # Trim to 90% so eviction runs once per batch of inserts
+                self._db.execute(f"DELETE FROM {table} WHERE key IN "
+                                 f"(SELECT key FROM {table} ORDER BY used_at LIMIT ?)", (count - int(limit * 0.9),))
+
+    def metadata(self, url):
+        return self._get("videos", video_id(url), self.metadata_ttl)
+
+    def put_metadata(self, url, meta):
+        self._put("videos", video_id(url), meta)
+
+    def videos_since(self, seq=0):
+        # (video_id, metadata, seq) for rows written after seq, in write
+        # order; lets an index catch up incrementally
+        with self._lock:
+            rows = self._db.execute("SELECT key, data, seq FROM videos WHERE seq > ? "
+                                    "ORDER BY seq", (seq,)).fetchall()
+        return [(key, json.loads(data), row_seq) for key, data, row_seq in rows]
+
+    def fresh_videos(self, keys):
+        # The video ids among keys still stored and within the metadata TTL;
+        # they count as used, so eviction keeps what the index serves
+        keys = list(keys)
+        if not keys:
+            return set()
+        now = time.time()
+        marks = ", ".join("?" * len(keys))
+        with self._lock:
+            fresh = {key for key, in self._db.execute(f"SELECT key FROM videos WHERE fetched_at >= ? AND key IN ({marks})",
+                                                      (now - self.metadata_ttl, *keys))}
+            self._db.execute(f"UPDATE videos SET used_at = ? WHERE key IN ({marks})", (now, *keys))
+        return fresh
+
+    def _search_key(self, query, page):
+        key = normalize_query(query)
+        return key if page == 0 else f"{key}#{page}"
+
+    def search(self, query, page=0):
+        return self._get("searches", self._search_key(query, page), self.search_ttl)
+
+    def put_search(self, query, results, page=0):
+        self._put("searches", self._search_key(query, page), results)
+
+    def purge(self):
+        # Drop expired rows; lookups already ignore them
+        now = time.time()
+        with self._lock:
+            self._db.execute("DELETE FROM videos WHERE fetched_at < ?", (now - self.metadata_ttl,))
+            self._db.execute("DELETE FROM searches WHERE fetched_at < ?", (now - self.search_ttl,))
+
+    def close(self):
+        self._db.close()
+
+
+@lru_cache(maxsize=None)
+def default_cache(path=CACHE_PATH):
+    return VideoCache(path)
+
+
+# --- Backend Wrapper ---
+class CachedBackend:
+    # Serves search lists and metadata from the cache and only goes to the
+    # wrapped backend on a miss.
+    def __init__(self, backend, cache):
+        self.backend = backend
+        self.cache = cache
+
+    def search_pages(self, query):
+        # Cached pages are replayed; from the first miss on, pages come from
+        # the wrapped backend (skipping the ones already served) and are
+        # stored as they arrive. An empty page marks the end of the results.
+        live = None
+        for page in itertools.count():
+            results = self.cache.search(query, page) if live is None else None
+            if results is None:
+                if live is None:
+                    live = itertools.islice(self.backend.search_pages(query), page, None)
+                results = next(live, [])
+                self.cache.put_search(query, results, page)
+            if not results:
+                return
+            yield results
+
+    def search(self, query):
+        return next(self.search_pages(query), [])
+
+    def metadata(self, url, timeout=None):
+        meta = self.cache.metadata(url)
+        if meta is None:
+            meta = self.backend.metadata(url, timeout) if timeout is not None else self.backend.metadata(url)
+            self.cache.put_metadata(url, meta)
+        return meta
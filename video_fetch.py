@@ -0,0 +1,226 @@
+import heapq
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+import metrics
+from keyword_matcher import default_matcher
+from thumbnails import default_thumbnails
+from video_cache import CachedBackend, default_cache
+
+# --- Defaults ---
+WORKERS = 8
+TIMEOUT = 10.0
+FETCH_BUDGET = 100
+TIME_BUDGET = 30.0
+BACKEND_URL_ENV = "CHE27_BACKEND_URL"
+
+
+# --- Backends ---
+# A backend has search_pages(query) -> iterator over pages of watch URLs,
+# search(query) -> first page, and metadata(url, timeout) -> dict with
+# video_id, title, description, length, thumbnail_url and watch_url.
+class PytubeBackend:
+    def search_pages(self, query):
+        from pytube import Search
+        search = Search(query)
+        seen = 0
+        while True:
+            results = search.results
+            if len(results) <= seen:
+                return
+            yield [video.watch_url for video in results[seen:]]
+            seen = len(results)
+            try:
+                search.get_next_results()
+            except IndexError:
+                return
+
+    def search(self, query):
+        return next(self.search_pages(query), [])
+
+    def metadata(self, url, timeout=TIMEOUT):
+        # pytube has no per-request timeout; fetch_metadata enforces it
+        from pytube import YouTube
+        yt = YouTube(url)
+        return {
+            "video_id": yt.video_id,
+            "title": yt.title,
+            "description": yt.description or "",
+            "length": yt.length,
+            "thumbnail_url": yt.thumbnail_url,
+            "watch_url": yt.watch_url,
+        }
+
+
+class HTTPBackend:
+    # JSON service: GET /search?q=...&page=N -> {"results": [watch_url, ...]}
+    # (empty past the last page), GET /video?url=... -> metadata object.
+    # Used for local stub servers.
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+
+    def _get(self, path, params, timeout):
+        url = f"{self.base_url}{path}?{urllib.parse.urlencode(params)}"
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return json.loads(response.read().decode("utf-8"))
+
+    def search_pages(self, query, timeout=TIMEOUT):
+        page = 0
+        while True:
+            results = self._get("/search", {"q": query, "page": page}, timeout)["results"]
+            if not results:
+                return
+            yield results
+            page += 1
+
+    def search(self, query, timeout=TIMEOUT):
+        return next(self.search_pages(query, timeout), [])
+
+    def metadata(self, url, timeout=TIMEOUT):
+        return self._get("/video", {"url": url}, timeout)
+
+
+def default_backend(cache=True):
+    # Results go through the shared on-disk cache unless cache=False
+    base_url = os.environ.get(BACKEND_URL_ENV)
+    backend = HTTPBackend(base_url) if base_url else PytubeBackend()
+    return CachedBackend(backend, default_cache()) if cache else backend
+
+
+# --- Concurrent Fetch ---
+def fetch_metadata(backend, urls, workers=WORKERS, timeout=TIMEOUT):
+    # Yields (url, metadata) in completion order; metadata is None when the
+    # fetch failed or ran longer than timeout seconds. At most `workers`
+    # requests are in flight and urls is only pulled as slots free up, so it
+    # can be a lazy generator. Each fetch runs on a daemon thread, so one that
+    # hangs past its timeout is abandoned and its slot goes to the next URL.
+    urls = iter(urls)
+    seen = set()
+    results = queue.Queue()
+    in_flight = {}
+
+    def fetch(url):
+        try:
+            with metrics.span("video.fetch"):
+                meta = backend.metadata(url, timeout)
+            metrics.count("video_fetches_total", result="ok")
+            results.put((url, meta))
+        except Exception:
+            metrics.count("video_fetches_total", result="error")
+            results.put((url, None))
+
+    while True:
+        while len(in_flight) < workers:
+            url = next((url for url in urls if url not in seen), None)
+            if url is None:
+                break
+            seen.add(url)
+            in_flight[url] = time.monotonic() + timeout
+            threading.Thread(target=fetch, args=(url,), name="video-fetch", daemon=True).start()
+        if not in_flight:
+            return
+        try:
+            url, meta = results.get(timeout=max(min(in_flight.values()) - time.monotonic(), 0))
+            if in_flight.pop(url, None) is not None:
+                yield url, meta
+        except queue.Empty:
+            pass
+        now = time.monotonic()
+        for url in [url for url, deadline in in_flight.items() if deadline <= now]:
+            del in_flight[url]
+            metrics.count("video_fetches_total", result="timeout")
+            yield url, None
+
+
+# --- Scoring ---
+def analyze_video(meta, min_duration, max_duration):
+    # Result card for one video, or None outside the duration bounds (minutes)
+    duration = meta["length"]
+    if not (min_duration * 60 <= duration <= max_duration * 60):
+        return None
+
+    title = meta["title"].lower()
+    description = meta["description"].lower() if meta["description"] else ""
+
+    # One pass over the text for every keyword list; weights live in data/keywords.json
+    with metrics.span("che27.score"):
+        groups, score = default_matcher().classify(title + description)
+
+    return {
+        "title": meta["title"],
+        "url": meta["watch_url"],
+        "duration": f"{duration // 60}:{duration % 60:02d}",
+        "language": groups.get("language", "other"),
+        "egyptian": "university" in groups,
+        "score": score,
+        "thumbnail": meta["thumbnail_url"],
+    }
+
+
+# --- Streaming Top-k ---
+def _search_urls(backend, query, positions):
+    # Flattens result pages lazily, recording each URL's search rank
+    pages = backend.search_pages(query)
+    while True:
+        with metrics.span("video.search_page"):
+            page = next(pages, None)
+        if page is None:
+            return
+        for url in page:
+            positions.setdefault(url, len(positions))
+            yield url
+
+
+def stream_top_videos(backend, query, k, analyze, max_score=None, max_fetches=FETCH_BUDGET,
+                      full_fetches=None, time_budget=TIME_BUDGET, workers=WORKERS, timeout=TIMEOUT):
+    # Pulls search pages only as metadata slots free up and keeps the best k
+    # videos in a min-heap ordered by (score, earlier search rank). After
+    # every completed fetch yields (fetches done, current top k best first).
+    # Once the heap is full of max_score videos a later-ranked result can only
+    # tie and lose, so no new URLs are pulled and the search ends when the
+    # fetches ranked ahead of the heap's last entry are in. Otherwise a full
+    # heap stops new fetches at full_fetches; only while fewer than k videos
+    # have qualified does the search page on, up to max_fetches. The time
+    # budget cuts it short regardless. analyze(meta) returns a video dict
+    # with "score" (and optionally "thumbnail") or None; a thumbnail starts
+    # downloading when its video enters the top k.
+    positions = {}
+    heap = []
+    completed = set()
+    saturated = False
+    full_fetches = max_fetches if full_fetches is None else min(full_fetches, max_fetches)
+    deadline = time.monotonic() + time_budget
+    # Checked as each URL is handed to a fetch slot, so the limit follows the heap
+    pulled = itertools.count()
+    urls = itertools.takewhile(lambda url: not saturated and (next(pulled) < full_fetches or len(heap) < k),
+                               itertools.islice(_search_urls(backend, query, positions), max_fetches))
+    results = fetch_metadata(backend, urls, workers, timeout)
+    try:
+        for done, (url, meta) in enumerate(results, 1):
+            completed.add(url)
+            try:
+                video = analyze(meta) if meta else None
+            except Exception:
+                # Malformed metadata only drops that video
+                video = None
+            if video is not None:
+                entry = (video["score"], -positions[url], video)
+                if len(heap) < k or entry[:2] > heap[0][:2]:
+                    default_thumbnails().prefetch(video.get("thumbnail"))
+                    (heapq.heappush if len(heap) < k else heapq.heapreplace)(heap, entry)
+            yield done, [video for _, _, video in sorted(heap, key=lambda e: e[:2], reverse=True)]
+            if max_score is not None and len(heap) == k and heap[0][0] >= max_score:
+                saturated = True
+                cutoff = -heap[0][1]
+                if all(url in completed for url, position in positions.items() if position < cutoff):
+                    break
+            if time.monotonic() > deadline:
+                break
+    finally:
+        results.close()
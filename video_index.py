@@ -0,0 +1,305 @@
+import math
+import os
+import pickle
+import re
+import threading
+from array import array
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+
+import metrics
+from video_cache import default_cache, video_id
+
+# --- Defaults ---
+INDEX_PATH = os.environ.get(
+    "CHE27_INDEX_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "video_index.pkl")
+)
+K1 = 1.2
+B = 0.75
+COMPACT_RATIO = 0.25
+MAX_MEMO_TERMS = 1 << 20
+# Index contents, as opposed to configuration, locking and sync state
+DATA_FIELDS = ("term_ids", "post_docs", "post_tfs", "lengths", "durations", "bonuses", "alive", "metas",
+               "doc_of", "total_length", "live_docs")
+SAVE_DELAY = 30.0  # seconds between background saves
+TOKEN = re.compile(r"\w+")
+ARABIC_DIACRITICS = re.compile("[\u064b-\u0652\u0640]")
+ARABIC_LETTERS = str.maketrans({"أ": "ا", "إ": "ا", "آ": "ا", "ة": "ه", "ى": "ي"})
+ARABIC_PREFIXES = ("وال", "بال", "كال", "فال", "لل", "ال")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is it of on or the to with this that how what "
+    "في من على الى إلى عن مع هذا هذه ذلك التي الذي او أو ثم".split()
+)
+
+
+# --- Tokenization ---
+def _term(token):
+    # Arabic tokens drop diacritics, unify alef/ta marbuta/alef maqsura and
+    # strip the article and attached particles; English tokens get a light
+    # plural strip. Stopwords map to "".
+    if token in STOPWORDS:
+        return ""
+    if "\u0600" <= token[0] <= "\u06ff":
+        token = ARABIC_DIACRITICS.sub("", token).translate(ARABIC_LETTERS)
+        for prefix in ARABIC_PREFIXES:
+            if token.startswith(prefix) and len(token) - len(prefix) >= 2:
+                return token[len(prefix):]
+        return token
+    if len(token) > 3 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+_TERMS = {}
+
+
+def tokenize(text):
+    # Casefolded \w+ runs, normalized per token. Normalizations are memoized:
+    # the vocabulary is far smaller than the token stream.
+    tokens = TOKEN.findall(text.casefold())
+    try:
+        terms = list(map(_TERMS.__getitem__, tokens))
+    except KeyError:
+        if len(_TERMS) > MAX_MEMO_TERMS:
+            _TERMS.clear()
+        terms = [_TERMS[token] if token in _TERMS else _TERMS.setdefault(token, _term(token)) for token in tokens]
+    return list(filter(None, terms))
+
+
+# --- Index ---
+def _doc_key(meta):
+    return meta.get("video_id") or video_id(meta["watch_url"])
+
+
+class VideoIndex:
+    # Append-only postings (int32 doc ids and term frequencies per term id)
+    # so adding documents never rewrites existing lists. Re-adding a video
+    # retires its old document; retired documents are skipped at query time
+    # and dropped by compact() once they make up COMPACT_RATIO of the index.
+    # bonus(meta) -> float is computed once per document when it is added.
+    def __init__(self, bonus=None):
+        self.bonus = bonus
+        self.term_ids = {}
+        self.post_docs = []
+        self.post_tfs = []
+        self.lengths = array("i")
+        self.durations = array("i")
+        self.bonuses = array("f")
+        self.alive = bytearray()
+        self.metas = []
+        self.doc_of = {}
+        self.total_length = 0
+        self.live_docs = 0
+        self.synced_seq = 0
+        self._lock = threading.RLock()
+        self._save_timer = None
+
+    def __len__(self):
+        return self.live_docs
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"], state["bonus"], state["_save_timer"]
+        return state
+
+    def __setstate__(self, state):
+        # Indexes saved before syncing by seq have synced_at instead; they
+        # catch up from the start (re-added videos retire their old copies)
+        state.pop("synced_at", None)
+        self.__dict__.update(state)
+        self.__dict__.setdefault("synced_seq", 0)
+        self.bonus = None
+        self._lock = threading.RLock()
+        self._save_timer = None
+
+    def add(self, meta):
+        self.add_many([meta])
+
+    def add_many(self, metas, bonuses=None):
+        # Documents are tokenized one by one, but postings for the whole batch
+        # are grouped by term with numpy and appended once per term
+        metas = list(metas)
+        if bonuses is None:
+            bonuses = [float(self.bonus(meta)) if self.bonus else 0.0 for meta in metas]
+        terms = []
+        tfs = array("i")
+        unique = array("i")
+        with self._lock:
+            first = len(self.metas)
+            for doc, (meta, bonus) in enumerate(zip(metas, bonuses), first):
+                key = _doc_key(meta)
+                self._retire(key)
+                tokens = tokenize(f"{meta['title']} {meta.get('description') or ''}")
+                counts = Counter(tokens)
+                terms.extend(counts)
+                tfs.extend(counts.values())
+                unique.append(len(counts))
+                self.lengths.append(len(tokens))
+                self.durations.append(int(meta.get("length") or 0))
+                self.bonuses.append(bonus)
+                self.alive.append(1)
+                self.metas.append(meta)
+                self.doc_of[key] = doc
+                self.total_length += len(tokens)
+                self.live_docs += 1
+
+            for term in set(terms).difference(self.term_ids):
+                self.term_ids[term] = len(self.post_docs)
+                self.post_docs.append(array("i"))
+                self.post_tfs.append(array("i"))
+            if terms:
+                ids = np.fromiter(map(self.term_ids.__getitem__, terms), dtype=np.int64, count=len(terms))
+                docs = np.repeat(np.arange(first, len(self.metas), dtype=np.int32),
+                                 np.frombuffer(unique, dtype=np.int32))
+                order = np.argsort(ids, kind="stable")
+                ids, docs, tf = ids[order], docs[order], np.frombuffer(tfs, dtype=np.int32)[order]
+                bounds = np.flatnonzero(np.diff(ids)) + 1
+                for start, end in zip(np.r_[0, bounds], np.r_[bounds, len(ids)]):
+                    self.post_docs[ids[start]].frombytes(docs[start:end].tobytes())
+                    self.post_tfs[ids[start]].frombytes(tf[start:end].tobytes())
+            self._maybe_compact()
+
+    def _retire(self, key):
+        doc = self.doc_of.pop(key, None)
+        if doc is not None:
+            self.alive[doc] = 0
+            self.total_length -= self.lengths[doc]
+            self.live_docs -= 1
+
+    def _maybe_compact(self):
+        if len(self.metas) - self.live_docs > COMPACT_RATIO * len(self.metas):
+            self.compact()
+
+    def remove(self, key):
+        with self._lock:
+            self._retire(key)
+            self._maybe_compact()
+
+    def compact(self):
+        # Rebuilds the live documents into a fresh index, then takes over its
+        # data under the lock this index's readers and savers already use
+        with self._lock:
+            live = [(meta, bonus) for meta, bonus, alive in zip(self.metas, self.bonuses, self.alive) if alive]
+            fresh = VideoIndex(self.bonus)
+            fresh.add_many([meta for meta, _ in live], [bonus for _, bonus in live])
+            for name in DATA_FIELDS:
+                setattr(self, name, getattr(fresh, name))
+
+    def sync(self, cache=None):
+        # Indexes videos written to the metadata cache since the last sync,
+        # by the cache's write sequence (a wall-clock time could skip rows
+        # committed out of timestamp order)
+        cache = cache or default_cache()
+        with self._lock:
+            rows = cache.videos_since(self.synced_seq)
+            if rows:
+                self.add_many(meta for _, meta, _ in rows)
+                self.synced_seq = rows[-1][2]
+        return len(rows)
+
+    def search(self, query, k=10, min_length=None, max_length=None, bonus_weight=1.0, min_coverage=0.0):
+        # BM25 over the query terms plus bonus_weight x the stored keyword
+        # bonus. Returns up to k (score, metadata) pairs, best first; only
+        # documents containing at least min_coverage of the query terms (and
+        # at least one) are returned. N and df count retired documents too,
+        # which compaction keeps to a small share.
+        terms = set(tokenize(query))
+        required = max(math.ceil(min_coverage * len(terms)), 1)
+        with self._lock, metrics.span("video.index_search"):
+            n = len(self.metas)
+            if not self.live_docs:
+                return []
+            lengths = np.frombuffer(self.lengths, dtype=np.int32)
+            scores = np.zeros(n)
+            hits = np.zeros(n, dtype=np.int32)
+            avg_length = self.total_length / self.live_docs
+            for term in terms:
+                term_id = self.term_ids.get(term)
+                if term_id is None:
+                    continue
+                docs = np.frombuffer(self.post_docs[term_id], dtype=np.int32)
+                tf = np.frombuffer(self.post_tfs[term_id], dtype=np.int32).astype(np.float64)
+                idf = np.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+                norm = K1 * (1 - B + B * lengths[docs] / avg_length)
+                scores[docs] += idf * tf * (K1 + 1) / (tf + norm)
+                hits[docs] += 1
+
+            matched = (hits >= required) & np.frombuffer(self.alive, dtype=np.uint8).astype(bool)
+            durations = np.frombuffer(self.durations, dtype=np.int32)
+            if min_length is not None:
+                matched &= durations >= min_length
+            if max_length is not None:
+                matched &= durations <= max_length
+            candidates = np.flatnonzero(matched)
+            if not candidates.size:
+                return []
+            final = scores[candidates] + bonus_weight * np.frombuffer(self.bonuses, dtype=np.float32)[candidates]
+            if candidates.size > k:
+                top = np.argpartition(-final, k - 1)[:k]
+                candidates, final = candidates[top], final[top]
+            order = np.lexsort((candidates, -final))
+            return [(float(final[i]), self.metas[candidates[i]]) for i in order]
+
+    def search_cached(self, query, k=10, min_length=None, max_length=None, cache=None, **options):
+        # search() limited to videos the metadata cache still holds within its
+        # TTL; documents it has evicted or expired are dropped as they turn up
+        cache = cache or default_cache()
+        while True:
+            results = self.search(query, k, min_length, max_length, **options)
+            keys = [_doc_key(meta) for _, meta in results]
+            stale = set(keys) - cache.fresh_videos(keys)
+            if not stale:
+                return results
+            with self._lock:
+                for key in stale:
+                    self._retire(key)
+                self._maybe_compact()
+
+    def save(self, path=INDEX_PATH):
+        with self._lock:
+            with open(path + ".tmp", "wb") as f:
+                pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(path + ".tmp", path)
+
+    def save_later(self, path=INDEX_PATH, delay=SAVE_DELAY):
+        # Saves on a background thread after `delay` seconds, covering every
+        # change made until then; calls while one is pending are free. A save
+        # lost at exit is made up by the next process's sync.
+        with self._lock:
+            if self._save_timer is None:
+                self._save_timer = threading.Timer(delay, self._save_pending, (path,))
+                self._save_timer.daemon = True
+                self._save_timer.start()
+
+    def _save_pending(self, path):
+        with self._lock:
+            self._save_timer = None
+            self.save(path)
+
+
+# --- Loading ---
+def load_index(path=INDEX_PATH, bonus=None):
+    with open(path, "rb") as f:
+        index = pickle.load(f)
+    index.bonus = bonus
+    return index
+
+
+@lru_cache(maxsize=None)
+def default_index(path=INDEX_PATH):
+    # Loaded once per process and caught up from the metadata cache; saved
+    # back in the background when the catch-up added documents. Bonuses come
+    # from the keyword matcher's classify() score.
+    from keyword_matcher import default_matcher
+
+    def bonus(meta):
+        return default_matcher().classify(meta["title"].lower() + (meta.get("description") or "").lower())[1]
+
+    index = load_index(path, bonus) if os.path.exists(path) else VideoIndex(bonus)
+    if index.sync():
+        index.save_later(path)
+    return index